@@ -7,14 +7,34 @@ Classes:
    - Values: SMALL = 0, MEDIUM = 1, LARGE = 2
 
 2. Product: Represents the products stored in lockers.
-   - Attributes: id , name, size, locker (refers to Locker)
+   - Attributes: id , name, size, locker (refers to Locker), pickup_code, deadline
 
 3. Locker: Represents the lockers that store products.
    - Attributes: id , size, product (refers to Product)
 
 4. System: Manages lockers and products.
-   - Attributes: lockers, products, available lockers [list of all assets]
-   - Methods: create_locker(size), create_product(name, size), fetch_locker(product), add_product(product), remove_product(product)
+   - Attributes: lockers, products, available lockers [FIFO deque of free lockers per size]
+   - Attributes: pickup_codes [one-time code -> locker], dwell_seconds, deadlines [heap of (deadline, seq, product)]
+   - Attributes: metrics (MetricsSink, no-op by default)
+   - Methods: create_locker(size), create_product(name, size), fetch_locker(product), add_product(product) -> pickup code, remove_product(product), has_free_locker(size)
+   - Methods: add_products(batch) -> pickup codes [all or nothing, largest-first packing], pickup(code), expire(now) -> reclaimed products
+
+5. LockerBank (System): A locker system at one geo-location.
+   - Attributes: id, name, latitude, longitude, point (unit-sphere vector used by the spatial index)
+   - Methods: distance_km(latitude, longitude) [great-circle distance, for reporting to customers]
+
+6. LockerNetwork: Many locker banks with a k-d tree over their locations.
+   - Attributes: banks, bank_of_product
+   - Methods: add_bank(name, latitude, longitude), nearest_bank(latitude, longitude, size), add_product(product, latitude, longitude), remove_product(product), pickup(bank_id, code), expire(now)
+
+7. FreeBitset / CompactLockerSystem: Array-backed locker state for networks with millions of lockers.
+   - Locker sizes in a byte array, stored product ids in an int64 array, one free-locker bitset per size.
+   - Methods: create_lockers(size, count), add_product(product) -> locker index, remove_product(product), free_lockers(size)
+
+8. LockerError / NoLockerAvailable / ProductNotInLocker / InvalidPickupCode / ProductAlreadyStored: Typed errors raised instead of printed.
+
+9. MetricsSink / InMemoryMetrics: Pluggable observer for System and LockerNetwork (no-op by default, so the hot path does no I/O).
+   - Methods: increment(name), observe(name, seconds) [latency histogram], failure(operation, reason), percentile(name, q)
 
 Usage:
 - System initialization
@@ -25,6 +45,14 @@ Usage:
 """
 
 
+import heapq
+import itertools
+import math
+import secrets
+import threading
+import time
+from array import array
+from collections import Counter, defaultdict, deque
 from enum import Enum
 
 class Size(Enum):
@@ -32,6 +60,79 @@ class Size(Enum):
     MEDIUM = 1
     LARGE = 2
 
+SIZES = list(Size)  # Indexed by Size.value, so fallbacks to larger sizes are a slice
+EARTH_RADIUS_KM = 6371.0
+PICKUP_CODE_DIGITS = 6
+DEFAULT_DWELL_SECONDS = 72 * 3600
+
+class LockerError(Exception):
+    pass
+
+class NoLockerAvailable(LockerError):
+    def __init__(self, size):
+        super().__init__(f'A suitable size locker is not available for {size.name}')
+        self.size = size
+
+class ProductNotInLocker(LockerError):
+    def __init__(self):
+        super().__init__('Product is not in a locker.')
+
+class InvalidPickupCode(LockerError):
+    def __init__(self):
+        super().__init__('Invalid or already used pickup code.')
+
+class ProductAlreadyStored(LockerError):
+    def __init__(self, product):
+        super().__init__(f'Product {product.id} is already in a locker or listed twice.')
+        self.product = product
+
+class MetricsSink:
+    # No-op default: the allocation path reports unconditionally and pays one method call
+    def increment(self, name, value=1):
+        pass
+
+    def observe(self, name, seconds):
+        pass
+
+    def failure(self, operation, reason):
+        pass
+
+class InMemoryMetrics(MetricsSink):
+    """
+    Counters, failure reasons and latency histograms kept in memory. Latencies are counted
+    in power-of-two microsecond buckets, so recording is O(1) and percentiles are upper bounds.
+    """
+    def __init__(self):
+        self.counters = Counter()
+        self.failures = Counter()  # (operation, reason) -> count
+        self.histograms = defaultdict(Counter)  # name -> {bucket: count}
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def observe(self, name, seconds):
+        bucket = int(seconds * 1e6).bit_length()  # Bucket b holds [2**(b-1), 2**b) us
+        with self._lock:
+            self.histograms[name][bucket] += 1
+
+    def failure(self, operation, reason):
+        with self._lock:
+            self.failures[operation, reason] += 1
+
+    def percentile(self, name, q):
+        histogram = self.histograms.get(name)
+        if not histogram:
+            return 0.0
+        rank = q * sum(histogram.values())
+        seen = 0
+        for bucket in sorted(histogram):
+            seen += histogram[bucket]
+            if seen >= rank:
+                break
+        return (1 << bucket) / 1e6
+
 class Product:
     ID = 0  # Class variable for auto-incrementing product ID
 
@@ -41,6 +142,8 @@ class Product:
         self.name = name
         self.size = self.get_size_enum(size)
         self.locker = None
+        self.pickup_code = None
+        self.deadline = None  # When an uncollected parcel's locker is reclaimed
 
     def get_size_enum(self, size_str):
         size_str = size_str.lower()
@@ -72,59 +175,371 @@ class Locker:
         return f"Locker(ID: {self.id}, Size: {self.size.name}, Occupied: {self.product is not None})"
 
 class System:
-    def __init__(self):
+    def __init__(self, dwell_seconds=DEFAULT_DWELL_SECONDS, clock=time.time, metrics=None):
         self.lockers = []
         self.products = {}
-        self.available_lockers = {Size.SMALL: [], Size.MEDIUM: [], Size.LARGE: []}
+        # FIFO queues of free lockers: popleft/append are O(1), unlike list.pop(0)
+        self.available_lockers = {size: deque() for size in SIZES}
+        self.pickup_codes = {}  # one-time code -> locker holding the parcel
+        self.dwell_seconds = dwell_seconds
+        self.clock = clock
+        # (deadline, seq, product) per deposit; entries for parcels already collected are
+        # skipped when popped instead of being searched for and removed
+        self.deadlines = []
+        self.deposit_seq = itertools.count()
+        self.metrics = metrics if metrics is not None else MetricsSink()
 
     def create_locker(self, size):
         locker = Locker(size)
         self.lockers.append(locker)
         self.available_lockers[locker.size].append(locker)
-        print(f"New locker added: {locker}")
+        self.metrics.increment('create_locker')
+        return locker
 
     def create_product(self, name, size):
         product = Product(size, name)
         self.products[product.id] = product
-        print(f"New product added: {product}")
+        self.metrics.increment('create_product')
         return product
 
     def fetch_locker(self, product):
-        try:
-            for size_val in range(product.size.value, 3):
-                if self.available_lockers[Size(size_val)]:
-                    locker = self.available_lockers[Size(size_val)].pop(0)
-                    return locker
-            raise Exception('A suitable size locker is not available')
-        except Exception as e:
-            print(e)
+        start = time.perf_counter()
+        for size in SIZES[product.size.value:]:
+            if self.available_lockers[size]:
+                locker = self.available_lockers[size].popleft()
+                self.metrics.observe('allocate', time.perf_counter() - start)
+                return locker
+        self.metrics.failure('allocate', f'no_{product.size.name.lower()}_locker')
+        raise NoLockerAvailable(product.size)
+
+    def _new_pickup_code(self):
+        while True:
+            code = f"{secrets.randbelow(10 ** PICKUP_CODE_DIGITS):0{PICKUP_CODE_DIGITS}d}"
+            if code not in self.pickup_codes:
+                return code
+
+    def _deposit(self, product, locker):
+        locker.product = product
+        product.locker = locker
+        product.pickup_code = self._new_pickup_code()
+        product.deadline = self.clock() + self.dwell_seconds
+        self.pickup_codes[product.pickup_code] = locker
+        heapq.heappush(self.deadlines, (product.deadline, next(self.deposit_seq), product))
+        return product.pickup_code
+
+    def add_product(self, product):
+        if product.locker:
+            self.metrics.failure('deposit', 'already_stored')
+            raise ProductAlreadyStored(product)
+        code = self._deposit(product, self.fetch_locker(product))
+        self.metrics.increment('deposit')
+        return code
+
+    def add_products(self, batch):
+        """
+        Stores a whole batch or nothing. Parcels are packed largest first, each into the
+        smallest free size that fits, which places a batch whenever any placement exists.
+        Returns the pickup codes in batch order.
+        """
+        seen = set()
+        for product in batch:
+            if product.locker or product.id in seen:
+                self.metrics.failure('add_products', 'already_stored')
+                raise ProductAlreadyStored(product)
+            seen.add(product.id)
+        free = [len(self.available_lockers[size]) for size in SIZES]
+        plan = []
+        for product in sorted(batch, key=lambda product: product.size.value, reverse=True):
+            for size_val in range(product.size.value, len(SIZES)):
+                if free[size_val]:
+                    free[size_val] -= 1
+                    plan.append((product, SIZES[size_val]))
+                    break
+            else:
+                self.metrics.failure('add_products', f'no_{product.size.name.lower()}_locker')
+                raise NoLockerAvailable(product.size)
+        codes = {}
+        for product, size in plan:
+            codes[product.id] = self._deposit(product, self.available_lockers[size].popleft())
+        self.metrics.increment('deposit', len(batch))
+        return [codes[product.id] for product in batch]
+
+    def _release(self, product):
+        locker = product.locker
+        self.available_lockers[locker.size].append(locker)
+        self.pickup_codes.pop(product.pickup_code, None)
+        locker.product = None
+        product.locker = None
+        product.pickup_code = None
+        self.products.pop(product.id, None)  # Deposits need not come from create_product
+        return locker
+
+    def remove_product(self, product):
+        if not product.locker:
+            self.metrics.failure('remove', 'not_in_locker')
+            raise ProductNotInLocker()
+        self.metrics.increment('remove')
+        return self._release(product)
+
+    def pickup(self, code):
+        # Codes are single use: a collected parcel's code is dropped from the index
+        locker = self.pickup_codes.get(code)
+        if locker is None:
+            self.metrics.failure('pickup', 'invalid_code')
+            raise InvalidPickupCode()
+        product = locker.product
+        self._release(product)
+        self.metrics.increment('pickup')
+        return product
+
+    def expire(self, now=None):
+        # Reclaims every locker whose parcel outstayed the dwell limit; returns those parcels
+        now = self.clock() if now is None else now
+        expired = []
+        while self.deadlines and self.deadlines[0][0] <= now:
+            deadline, _, product = heapq.heappop(self.deadlines)
+            if product.locker is not None and product.deadline == deadline:
+                self._release(product)
+                expired.append(product)
+        self.metrics.increment('expired', len(expired))
+        return expired
+
+    def has_free_locker(self, size):
+        return any(self.available_lockers[fit] for fit in SIZES[size.value:])
+
+class LockerBank(System):
+    # A System at one pickup location; `point` is its position on the unit sphere, so
+    # Euclidean (chord) distance between points orders banks the same as great-circle distance.
+    ID = 0
+
+    def __init__(self, name, latitude, longitude, dwell_seconds=DEFAULT_DWELL_SECONDS, clock=time.time,
+                 metrics=None):
+        super().__init__(dwell_seconds, clock, metrics)
+        self.id = LockerBank.ID
+        LockerBank.ID += 1
+        self.name = name
+        self.latitude = latitude
+        self.longitude = longitude
+        self.point = to_unit_vector(latitude, longitude)
+
+    def distance_km(self, latitude, longitude):
+        return haversine_km(self.latitude, self.longitude, latitude, longitude)
+
+    def __str__(self):
+        return f"LockerBank(ID: {self.id}, Name: {self.name}, At: {self.latitude}, {self.longitude})"
+
+def to_unit_vector(latitude, longitude):
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+class KDNode:
+    __slots__ = ('bank', 'axis', 'left', 'right')
+
+    def __init__(self, bank, axis, left, right):
+        self.bank = bank
+        self.axis = axis
+        self.left = left
+        self.right = right
+
+class LockerNetwork:
+    """
+    Locker banks spread over a region. Banks are indexed in a 3-d k-d tree over their unit
+    sphere points, rebuilt lazily after banks are added; a nearest query walks the tree,
+    skipping banks with no compatible free locker and pruning subtrees that cannot beat the
+    best bank found so far.
+    """
+    def __init__(self, metrics=None):
+        self.banks = {}
+        self.bank_of_product = {}  # product id -> LockerBank holding it
+        self.root = None
+        self.dirty = False
+        self.metrics = metrics if metrics is not None else MetricsSink()  # Shared with every bank
+
+    def add_bank(self, name, latitude, longitude):
+        bank = LockerBank(name, latitude, longitude, metrics=self.metrics)
+        self.banks[bank.id] = bank
+        self.dirty = True
+        return bank
+
+    def _build(self, banks, depth=0):
+        if not banks:
             return None
+        axis = depth % 3
+        banks.sort(key=lambda bank: bank.point[axis])
+        middle = len(banks) // 2
+        return KDNode(banks[middle], axis,
+                      self._build(banks[:middle], depth + 1),
+                      self._build(banks[middle + 1:], depth + 1))
+
+    def nearest_bank(self, latitude, longitude, size):
+        # Nearest bank that still has a free locker fitting `size`, or None
+        size = Size[size.upper()] if isinstance(size, str) else size
+        if self.dirty:
+            self.root = self._build(list(self.banks.values()))
+            self.dirty = False
+        target = to_unit_vector(latitude, longitude)
+        best_bank, best_distance = None, float('inf')
+        stack = [(self.root, 0.0)]  # (subtree, lower bound on its squared distance)
+        while stack:
+            node, bound = stack.pop()
+            if node is None or bound >= best_distance:
+                continue
+            point = node.bank.point
+            distance = ((point[0] - target[0]) ** 2 + (point[1] - target[1]) ** 2
+                        + (point[2] - target[2]) ** 2)
+            if distance < best_distance and node.bank.has_free_locker(size):
+                best_bank, best_distance = node.bank, distance
+            diff = target[node.axis] - point[node.axis]
+            near, far = (node.left, node.right) if diff < 0 else (node.right, node.left)
+            stack.append((far, diff * diff))
+            stack.append((near, bound))
+        return best_bank
+
+    def add_product(self, product, latitude, longitude):
+        if product.locker or product.id in self.bank_of_product:
+            self.metrics.failure('route', 'already_stored')
+            raise ProductAlreadyStored(product)
+        start = time.perf_counter()
+        bank = self.nearest_bank(latitude, longitude, product.size)
+        self.metrics.observe('route', time.perf_counter() - start)
+        if bank is None:
+            self.metrics.failure('route', f'no_{product.size.name.lower()}_locker')
+            raise NoLockerAvailable(product.size)
+        bank.add_product(product)
+        bank.products[product.id] = product  # Registered only once the deposit succeeded
+        self.bank_of_product[product.id] = bank
+        return bank
+
+    def remove_product(self, product):
+        bank = self.bank_of_product.pop(product.id, None)
+        if bank is None:
+            self.metrics.failure('remove', 'not_in_locker')
+            raise ProductNotInLocker()
+        return bank.remove_product(product)
+
+    def pickup(self, bank_id, code):
+        product = self.banks[bank_id].pickup(code)
+        del self.bank_of_product[product.id]
+        return product
+
+    def expire(self, now=None):
+        expired = []
+        for bank in self.banks.values():
+            for product in bank.expire(now):
+                del self.bank_of_product[product.id]
+                expired.append(product)
+        return expired
+
+class FreeBitset:
+    # Free slots of one size as a bitset over 64-bit words; `hint` is the lowest word that
+    # may still have a set bit, so finding a free slot is a short word scan plus a bit trick.
+    def __init__(self, capacity=0):
+        self.words = array('Q', bytes(8 * ((capacity + 63) // 64)))
+        self.hint = len(self.words)
+        self.count = 0
+
+    def grow(self, capacity):
+        missing = (capacity + 63) // 64 - len(self.words)
+        if missing > 0:
+            self.words.extend(array('Q', bytes(8 * missing)))
+
+    def add(self, index):
+        word = index >> 6
+        self.words[word] |= 1 << (index & 63)
+        self.count += 1
+        if word < self.hint:
+            self.hint = word
+
+    def add_range(self, start, stop):
+        # Used when a block of slots is created at once: whole words are filled directly
+        index = start
+        while index < stop and index & 63:
+            self.add(index)
+            index += 1
+        while index + 64 <= stop:
+            self.words[index >> 6] = 0xFFFFFFFFFFFFFFFF
+            self.hint = min(self.hint, index >> 6)
+            self.count += 64
+            index += 64
+        while index < stop:
+            self.add(index)
+            index += 1
+
+    def pop_first(self):
+        words = self.words
+        word_index = self.hint
+        while word_index < len(words) and not words[word_index]:
+            word_index += 1
+        self.hint = word_index
+        if word_index == len(words):
+            return -1
+        word = words[word_index]
+        words[word_index] = word & (word - 1)  # Clear the lowest set bit
+        self.count -= 1
+        return (word_index << 6) | ((word & -word).bit_length() - 1)
+
+
+class CompactLockerSystem:
+    """
+    Array-backed alternative to System for locker networks with millions of lockers. A locker
+    is an index: its size is a byte in `sizes`, the stored product's id an int64 in
+    `occupants` (-1 when empty), and each size keeps a FreeBitset of empty lockers.
+    """
+    EMPTY = -1
+
+    def __init__(self):
+        self.sizes = array('B')
+        self.occupants = array('q')
+        self.free = [FreeBitset() for _ in Size]
+        self.locker_of_product = {}  # product id -> locker index, only for stored products
+
+    def create_lockers(self, size, count):
+        size = Size[size.upper()] if isinstance(size, str) else size
+        start = len(self.sizes)
+        self.sizes.extend(bytes([size.value]) * count)
+        self.occupants.extend(array('q', [self.EMPTY]) * count)
+        for bitset in self.free:
+            bitset.grow(len(self.sizes))
+        self.free[size.value].add_range(start, start + count)
+        return range(start, start + count)
 
     def add_product(self, product):
-        locker = self.fetch_locker(product)
-        if locker:
-            locker.product = product
-            product.locker = locker
-            print(f"{product} put in: {locker}")
+        if product.id in self.locker_of_product:
+            raise ProductAlreadyStored(product)
+        for size_val in range(product.size.value, len(Size)):
+            locker = self.free[size_val].pop_first()
+            if locker != -1:
+                self.occupants[locker] = product.id
+                self.locker_of_product[product.id] = locker
+                return locker
+        raise NoLockerAvailable(product.size)
 
     def remove_product(self, product):
-        locker = product.locker
-        if locker:
-            self.available_lockers[locker.size].append(locker)
-            locker.product = None
-            product.locker = None
-            del self.products[product.id]
-            print(f"{product} has been removed from: {locker}")
-        else:
-            print("Product is not in a locker.")
+        locker = self.locker_of_product.pop(product.id, None)
+        if locker is None:
+            raise ProductNotInLocker()
+        self.occupants[locker] = self.EMPTY
+        self.free[self.sizes[locker]].add(locker)
+        return locker
+
+    def free_lockers(self, size):
+        size = Size[size.upper()] if isinstance(size, str) else size
+        return self.free[size.value].count
 
 if __name__ == '__main__':
-    system = System()
+    metrics = InMemoryMetrics()
+    system = System(metrics=metrics)
     system.create_locker('small')
     system.create_locker('medium')
     system.create_locker('large')
     product1 = system.create_product("Laptop", "medium")
     system.add_product(product1)
+    print(f"{product1} put in: {product1.locker}")
 
     product2 = system.create_product("Phone", "small")
     product3 = system.create_product("Monitor", "large")
@@ -133,8 +548,48 @@ if __name__ == '__main__':
 
     # Attempt to add another product with no available locker
     product4 = system.create_product("Tablet", "medium")
-    system.add_product(product4)
+    try:
+        system.add_product(product4)
+    except NoLockerAvailable as e:
+        print(e)
 
+    print(f"Metrics: {dict(metrics.counters)}, failures {dict(metrics.failures)}")
     # print(system.products)
 
+    # Array-backed locker network
+    network = CompactLockerSystem()
+    network.create_lockers('small', 500000)
+    network.create_lockers('medium', 300000)
+    network.create_lockers('large', 200000)
+    parcel = Product('medium', 'Parcel')
+    print(f"Compact network: {parcel} -> locker {network.add_product(parcel)}, "
+          f"free medium {network.free_lockers('medium')}")
+
+    # Nearest locker bank for a delivery address
+    city = LockerNetwork()
+    for name, latitude, longitude in [("Central", 40.7527, -73.9772), ("Harlem", 40.8116, -73.9465),
+                                      ("Brooklyn", 40.6782, -73.9442), ("Jersey City", 40.7178, -74.0431)]:
+        bank = city.add_bank(name, latitude, longitude)
+        bank.create_locker('small')
+        bank.create_locker('large')
+    for name in ("Shoes", "Books"):
+        parcel = Product("small", name)
+        bank = city.add_product(parcel, 40.7580, -73.9855)  # Times Square
+        print(f"{parcel} routed to {bank}, {bank.distance_km(40.7580, -73.9855):.2f} km away")
 
+    # Pickup codes, a truck's batch and expiry of uncollected parcels
+    now = [0.0]
+    depot = System(dwell_seconds=3600, clock=lambda: now[0])
+    for size in ('small', 'small', 'medium', 'large'):
+        depot.create_locker(size)
+    load = [depot.create_product(name, size) for name, size in
+            [("Cable", "small"), ("Kettle", "medium"), ("Chair", "large"), ("Mug", "small")]]
+    codes = depot.add_products(load)
+    print(f"Pickup codes: {codes}")
+    print(f"Picked up: {depot.pickup(codes[0])}")
+    try:
+        depot.pickup(codes[0])  # Codes are single use
+    except InvalidPickupCode as e:
+        print(e)
+    now[0] += 7200
+    print(f"Expired: {[product.name for product in depot.expire()]}")
@@ -5,58 +5,474 @@ LLD FILE SYSTEM SEARCH
 
 Classes:
 1. File: Represents a file in the file system.
-   - Attributes: name, extension, size
-   - Methods: get_name(), get_extension(), get_size()
+   - Attributes: name, extension, size, parent
+   - Methods: full_name(), path()
 
-2. FileSystem: Represents a directory or a collection of files.
-   - Attributes: name, is_directory, sub_directories, files
-   - Methods: None
+2. Directory: Represents a directory holding files and subdirectories.
+   - Attributes: name, is_directory, parent, subdirectories (name -> Directory), files (full name -> File), mtime
+   - Methods: path(), add_subdirectory(directory), add_file(file), remove_file(full_name)
 
-3. Filter (Abstract Class): Base class for different types of file filters.
+3. FileSystem: Owns the directory tree and a path -> node index.
+   - Attributes: root, nodes, index, source_root
+   - Methods: mkdir(path), add_file(directory_path, file), resize(path, size), remove(path), resolve(path), real_path(path)
+   - load_file_system(source_root, workers) builds one from a real directory, scanning directories in parallel.
+   - save_snapshot / load_snapshot persist the scanned tree (gzip'd, one mtime per directory);
+     refresh(fs, dirty) re-lists only directories whose mtime changed, or the ones InotifyWatcher.poll() reports.
+
+4. Filter (Abstract Class): Base class for different types of file filters.
    - Methods: match(file) -> bool
 
-4. NameFilter: Filters files based on their name.
+5. NameFilter: Filters files based on their name.
    - Inherits: Filter
    - Attributes: name
    - Methods: match(file) -> bool
 
-5. SizeFilter: Filters files based on their size with a given comparison operator.
+6. SizeFilter: Filters files based on their size with a given comparison operator.
    - Inherits: Filter
-   - Attributes: size, operator
+   - Attributes: size, operator (one of <, <=, ==, !=, >=, >)
    - Methods: match(file) -> bool
 
-6. ExtensionFilter: Filters files based on their extension.
+7. ExtensionFilter: Filters files based on their extension.
    - Inherits: Filter
    - Attributes: extension
    - Methods: match(file) -> bool
 
-7. Search: Handles searching files in the file system based on provided filters.
-   - Attributes: file_system, filters, condition
-   - Methods: check_conditions(file) -> bool, find_files() -> List[str]
+8. NamePatternFilter: Filters files whose full name matches a glob pattern (substring = "*text*").
+   - Inherits: Filter
+   - Attributes: pattern, regex
+
+9. ContentRegexFilter / ContentHashFilter: Filter on file bytes (regex via mmap, chunked content hash).
+   - Inherits: Filter
+   - Attributes: pattern or digest, file_system (to map model paths to real paths)
+   - find_duplicates(fs) groups identical files: size, then partial hash, then full hash on a worker pool.
+
+10. AndFilter / OrFilter / NotFilter: Combine filters into nested boolean expressions.
+   - Inherits: Filter
+   - compile_filter(filter) turns any filter tree into one short-circuiting predicate, cheapest checks first.
+
+11. FileIndex: Secondary indexes maintained by FileSystem on add/remove/resize.
+   - Attributes: files, by_extension, by_name, by_trigram (hash indexes), sizes (sorted, for range queries; changes are batched and merged on the next read)
+   - Methods: add(path, file), remove(path, file), resize(path, file, size), estimate(filter), candidates(filter) -> Optional[Set[path]]
+
+12. FileSearch: Handles searching files in the file system based on provided filters.
+   - Attributes: root_directory, filters, condition, index, predicate (compiled once from filters)
+   - Methods: check_conditions(file) -> bool, iter_matches() -> Iterator[(path, File)],
+              find_files(sort_by, descending, limit, offset) -> List[str], count() -> int,
+              top_k(k, largest) -> List[(path, File)], page(limit, cursor, sort_by, descending) -> (results, next_cursor),
+              iter_scan(source_root, file_system, workers) -> streams matches while a real directory is walked
 
 Usage:
-- Initialize FileSystem with directories and files.
+- Initialize FileSystem and create directories and files by path.
 - Create specific filter objects (NameFilter, SizeFilter, ExtensionFilter).
-- Create a Search object with the FileSystem and a list of filters.
-- Call find_files() method to get a list of files that match the filters.
+- Create a FileSearch object with a root Directory and a list of filters.
+- Call find_files() to get the paths of matching files, or iter_matches() to stream (path, File) pairs.
+- Load a real directory with load_file_system(path), or stream matches during the walk with FileSearch.iter_scan(path).
+- Pass index=file_system.index to FileSearch to intersect index candidates instead of walking the tree.
 
 
 """
+import bisect
+import ctypes
+import ctypes.util
+import fnmatch
+import gzip
+import hashlib
+import heapq
+import itertools
+import mmap
+import operator
+import os
+import re
+import struct
+import sys
 from abc import ABC, abstractmethod
-from typing import List
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
 
 class File:
     def __init__(self, name: str, extension: str, size: int):
         self.name = name
         self.extension = extension
         self.size = size
+        self.parent: Optional["Directory"] = None
+
+    def full_name(self) -> str:
+        return f"{self.name}.{self.extension}" if self.extension else self.name
+
+    def path(self) -> str:
+        return join_path(self.parent.path(), self.full_name()) if self.parent else self.full_name()
 
 class Directory:
     def __init__(self, name: str, is_directory: bool = False):
         self.name = name
         self.is_directory = is_directory
-        self.subdirectories = []
-        self.files = []
+        self.parent: Optional["Directory"] = None
+        self.mtime: Optional[int] = None  # st_mtime_ns of the real directory, when scanned from disk
+        self.subdirectories: Dict[str, "Directory"] = {}
+        self.files: Dict[str, File] = {}
+
+    def path(self) -> str:
+        if self.parent is None:
+            return self.name
+        return join_path(self.parent.path(), self.name)
+
+    def add_subdirectory(self, directory: "Directory") -> "Directory":
+        if directory.name in self.subdirectories or directory.name in self.files:
+            raise ValueError(f"'{directory.name}' already exists in {self.path()}")
+        directory.parent = self
+        self.subdirectories[directory.name] = directory
+        return directory
+
+    def add_file(self, file: File) -> File:
+        full_name = file.full_name()
+        if full_name in self.files or full_name in self.subdirectories:
+            raise ValueError(f"'{full_name}' already exists in {self.path()}")
+        file.parent = self
+        self.files[full_name] = file
+        return file
+
+    def remove_file(self, full_name: str) -> File:
+        file = self.files.pop(full_name)
+        file.parent = None
+        return file
+
+def join_path(directory_path: str, name: str) -> str:
+    return directory_path.rstrip("/") + "/" + name
+
+def split_path(path: str) -> Tuple[str, str]:
+    path = path.rstrip("/") or "/"
+    parent, _, name = path.rpartition("/")
+    return parent or "/", name
+
+class FileSystem:
+    def __init__(self, source_root: Optional[str] = None):
+        self.root = Directory("/", True)
+        self.nodes: Dict[str, object] = {"/": self.root}  # Absolute path -> Directory or File
+        self.index = FileIndex()
+        self.source_root = source_root  # Real directory mirrored at "/", when loaded from disk
+
+    def real_path(self, path: str) -> str:
+        if self.source_root is None:
+            raise ValueError("File system was not loaded from disk")
+        return os.path.join(self.source_root, path.lstrip("/"))
+
+    def add_scanned(self, directory_path: str, files: List[File], subdirectory_names: List[str],
+                    mtime: Optional[int] = None):
+        directory = self.mkdir(directory_path)
+        directory.mtime = mtime
+        for file in files:
+            directory.add_file(file)
+            path = join_path(directory_path, file.full_name())
+            self.nodes[path] = file
+            self.index.add(path, file)
+        for name in subdirectory_names:
+            self.mkdir(join_path(directory_path, name))
+
+    def resolve(self, path: str):
+        return self.nodes.get(path.rstrip("/") or "/")
+
+    def mkdir(self, path: str) -> Directory:
+        # Creates missing parents, like mkdir -p
+        node = self.resolve(path)
+        if isinstance(node, Directory):
+            return node
+        if node is not None:
+            raise ValueError(f"{path} is a file")
+        parent_path, name = split_path(path)
+        directory = self.mkdir(parent_path).add_subdirectory(Directory(name, True))
+        self.nodes[directory.path()] = directory
+        return directory
+
+    def add_file(self, directory_path: str, file: File) -> File:
+        self.mkdir(directory_path).add_file(file)
+        path = file.path()
+        self.nodes[path] = file
+        self.index.add(path, file)
+        return file
+
+    def resize(self, path: str, size: int) -> File:
+        file = self.resolve(path)
+        if not isinstance(file, File):
+            raise ValueError(f"{path} is not a file")
+        self.index.resize(path, file, size)
+        return file
+
+    def remove(self, path: str):
+        node = self.resolve(path)
+        if node is None or node is self.root:
+            raise ValueError(f"Cannot remove {path}")
+        if isinstance(node, File):
+            path = node.path()
+            del self.nodes[path]
+            self.index.remove(path, node)
+            node.parent.remove_file(node.full_name())
+            return node
+        for sub_path, sub_node in list(iter_tree(node)):
+            self.nodes.pop(sub_path, None)
+            if isinstance(sub_node, File):
+                self.index.remove(sub_path, sub_node)
+        del self.nodes[node.path()]
+        del node.parent.subdirectories[node.name]
+        node.parent = None
+        return node
+
+def file_from_name(full_name: str, size: int) -> File:
+    name, dot, extension = full_name.rpartition(".")
+    if not dot or not name or not extension:  # "Makefile", ".bashrc", "notes."
+        return File(full_name, "", size)
+    return File(name, extension, size)
+
+ScanResult = Tuple[str, str, List[File], List[str], Optional[int]]
+
+def scan_one_directory(real_path: str, model_path: str) -> ScanResult:
+    files, subdirectory_names = [], []
+    mtime = None
+    try:
+        # Read before listing, so a change racing with the scan shows up on the next refresh
+        mtime = os.stat(real_path, follow_symlinks=False).st_mtime_ns
+        with os.scandir(real_path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectory_names.append(entry.name)
+                    elif entry.is_file(follow_symlinks=False):
+                        files.append(file_from_name(entry.name, entry.stat(follow_symlinks=False).st_size))
+                except OSError:
+                    continue  # Entry vanished or cannot be stat'ed
+    except OSError:
+        pass  # Unreadable directory: keep it, empty
+    return real_path, model_path, files, subdirectory_names, mtime
+
+def default_workers() -> int:
+    return min(32, (os.cpu_count() or 1) * 4)
+
+def scan_tree(source_root: str, workers: Optional[int] = None,
+              model_root: str = "/") -> Iterator[Tuple[str, List[File], List[str], Optional[int]]]:
+    # Scans every directory as its own task on a thread pool (scandir/stat release the GIL)
+    # and yields (model path, files, subdirectory names, mtime) as soon as each one finishes.
+    # A parent is always yielded before its children.
+    pool = ThreadPoolExecutor(max_workers=workers or default_workers())
+    pending = {pool.submit(scan_one_directory, source_root, model_root)}
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                real_path, model_path, files, subdirectory_names, mtime = future.result()
+                for name in subdirectory_names:
+                    pending.add(pool.submit(scan_one_directory, os.path.join(real_path, name),
+                                            join_path(model_path, name)))
+                yield model_path, files, subdirectory_names, mtime
+    finally:
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False)
+
+def load_file_system(source_root: str, workers: Optional[int] = None) -> FileSystem:
+    fs = FileSystem(os.path.abspath(source_root))
+    for directory_path, files, subdirectory_names, mtime in scan_tree(fs.source_root, workers):
+        fs.add_scanned(directory_path, files, subdirectory_names, mtime)
+    return fs
+
+# Snapshot format (gzip'd text, one record per line, directories in pre-order):
+#   R <tab> source root
+#   D <tab> directory path <tab> mtime_ns
+#   F <tab> full file name <tab> size        (belongs to the preceding D)
+# Names are escaped so tabs and newlines in file names cannot break the format.
+
+def escape_field(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+def unescape_field(value: str) -> str:
+    if "\\" not in value:
+        return value
+    return re.sub(r"\\(.)", lambda m: {"t": "\t", "n": "\n"}.get(m.group(1), m.group(1)), value)
+
+def save_snapshot(fs: FileSystem, snapshot_path: str):
+    with gzip.open(snapshot_path, "wt", encoding="utf-8", errors="surrogateescape") as out:
+        out.write(f"R\t{escape_field(fs.source_root or '')}\n")
+        stack = [("/", fs.root)]
+        while stack:
+            directory_path, directory = stack.pop()
+            mtime = "" if directory.mtime is None else directory.mtime
+            out.write(f"D\t{escape_field(directory_path)}\t{mtime}\n")
+            for full_name, file in directory.files.items():
+                out.write(f"F\t{escape_field(full_name)}\t{file.size}\n")
+            for name, subdirectory in directory.subdirectories.items():
+                stack.append((join_path(directory_path, name), subdirectory))
+
+def load_snapshot(snapshot_path: str) -> FileSystem:
+    fs = FileSystem()
+    directory_path, files, mtime = None, [], None
+
+    def flush():
+        if directory_path is not None:
+            fs.add_scanned(directory_path, files, [], mtime)
+
+    with gzip.open(snapshot_path, "rt", encoding="utf-8", errors="surrogateescape") as snapshot:
+        for line in snapshot:
+            kind, first, *rest = line.rstrip("\n").split("\t")
+            if kind == "F":
+                files.append(file_from_name(unescape_field(first), int(rest[0])))
+            elif kind == "D":
+                flush()
+                directory_path, files = unescape_field(first), []
+                mtime = int(rest[0]) if rest[0] else None
+            elif kind == "R":
+                fs.source_root = unescape_field(first) or None
+    flush()
+    return fs
+
+def stat_mtime(real_path: str) -> Optional[int]:
+    try:
+        return os.stat(real_path, follow_symlinks=False).st_mtime_ns
+    except OSError:
+        return None
+
+def refresh(fs: FileSystem, dirty: Optional[Set[str]] = None, workers: Optional[int] = None) -> Dict[str, int]:
+    """
+    Brings a scanned FileSystem (and its indexes) up to date with the disk.
+
+    Without `dirty`, every directory's mtime is re-stat'ed in parallel and only directories
+    whose mtime changed are re-listed. A directory's mtime changes when entries are added,
+    removed or renamed, not when a file inside is rewritten, so size-only changes are picked
+    up when the caller passes those directories in `dirty` (InotifyWatcher.poll() does).
+    """
+    with ThreadPoolExecutor(max_workers=workers or default_workers()) as pool:
+        if dirty is None:
+            directories = [(path, node) for path, node in fs.nodes.items() if isinstance(node, Directory)]
+            mtimes = pool.map(stat_mtime, [fs.real_path(path) for path, _ in directories], chunksize=256)
+            changed = [path for (path, directory), mtime in zip(directories, mtimes)
+                       if mtime is not None and mtime != directory.mtime]
+            checked = len(directories)
+        else:
+            changed = [path for path in dirty if isinstance(fs.resolve(path), Directory)]
+            checked = len(changed)
+        listings = list(pool.map(lambda path: scan_one_directory(fs.real_path(path), path), sorted(changed)))
+
+    stats = {"checked": checked, "rescanned": 0, "added": 0, "removed": 0, "resized": 0}
+    for real_path, directory_path, files, subdirectory_names, mtime in listings:
+        directory = fs.resolve(directory_path)
+        if not isinstance(directory, Directory) or mtime is None:
+            continue  # Removed together with a parent processed earlier, or vanished from disk
+        stats["rescanned"] += 1
+        apply_listing(fs, directory, directory_path, files, subdirectory_names, stats, workers)
+        directory.mtime = mtime
+    return stats
+
+def apply_listing(fs: FileSystem, directory: Directory, directory_path: str, files: List[File],
+                  subdirectory_names: List[str], stats: Dict[str, int], workers: Optional[int]):
+    listed = {file.full_name(): file for file in files}
+    listed_directories = set(subdirectory_names)
+    for full_name in [name for name in directory.files if name not in listed]:
+        fs.remove(join_path(directory_path, full_name))
+        stats["removed"] += 1
+    for name in [name for name in directory.subdirectories if name not in listed_directories]:
+        fs.remove(join_path(directory_path, name))
+        stats["removed"] += 1
+    for full_name, file in listed.items():
+        existing = directory.files.get(full_name)
+        if existing is None:
+            fs.add_file(directory_path, file)
+            stats["added"] += 1
+        elif existing.size != file.size:
+            fs.resize(join_path(directory_path, full_name), file.size)
+            stats["resized"] += 1
+    for name in listed_directories - set(directory.subdirectories):
+        sub_path = join_path(directory_path, name)
+        for path, sub_files, sub_names, mtime in scan_tree(fs.real_path(sub_path), workers, sub_path):
+            fs.add_scanned(path, sub_files, sub_names, mtime)
+            stats["added"] += len(sub_files) + 1
+
+class InotifyWatcher:
+    # Linux-only change journal: marks directories dirty from inotify events so refresh()
+    # can skip the mtime sweep. One watch per directory (see fs.inotify.max_user_watches).
+    IN_MODIFY = 0x002
+    IN_ATTRIB = 0x004
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_MOVE_SELF = 0x800
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+            | IN_DELETE_SELF | IN_MOVE_SELF)
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, fs: FileSystem):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.fs = fs
+        self.watches: Dict[int, str] = {}  # watch descriptor -> directory path
+        self.dirty: Set[str] = set()  # Read from the queue but not yet returned by poll()
+        self.overflowed = False
+        self.sync()
+
+    def sync(self):
+        # Adds watches for directories created since the last call (e.g. after a refresh) and
+        # re-adds the ones the kernel dropped because their directory was deleted or replaced
+        self._drain()
+        watched = set(self.watches.values())
+        for path, node in list(self.fs.nodes.items()):
+            if isinstance(node, Directory) and path not in watched:
+                wd = self.libc.inotify_add_watch(self.fd, os.fsencode(self.fs.real_path(path)), self.MASK)
+                if wd >= 0:
+                    self.watches[wd] = path
+
+    def poll(self) -> Optional[Set[str]]:
+        # Directories touched since the last poll; None after a queue overflow, meaning
+        # events were lost and the caller should fall back to a full mtime sweep.
+        self._drain()
+        dirty, self.dirty = self.dirty, set()
+        if self.overflowed:
+            self.overflowed = False
+            return None
+        return dirty
+
+    def _drain(self):
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+                offset += self.EVENT.size + length
+                if mask & self.IN_Q_OVERFLOW:
+                    self.overflowed = True
+                elif mask & self.IN_IGNORED:
+                    self.watches.pop(wd, None)  # The kernel removed the watch; sync() re-adds it
+                elif wd in self.watches:
+                    self.dirty.add(self.watches[wd])
+                    if mask & self.IN_MOVE_SELF:
+                        # The watch follows the inode, so its path is stale; drop it until sync()
+                        self.libc.inotify_rm_watch(self.fd, wd)
+                        del self.watches[wd]
+
+    def close(self):
+        os.close(self.fd)
+
+def iter_tree(directory: Directory) -> Iterator[Tuple[str, object]]:
+    # Iterative DFS yielding (path, node) for every file and directory below `directory`
+    stack = deque([(directory.path(), directory)])
+    while stack:
+        current_path, current = stack.pop()
+        for full_name, file in current.files.items():
+            yield join_path(current_path, full_name), file
+        for name, subdirectory in current.subdirectories.items():
+            sub_path = join_path(current_path, name)
+            yield sub_path, subdirectory
+            stack.append((sub_path, subdirectory))
 
 class Filter(ABC):
     @abstractmethod
@@ -70,13 +486,25 @@ class NameFilter(Filter):
     def match(self, file: File) -> bool:
         return file.name == self.name
 
+SIZE_OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">=": operator.ge,
+    ">": operator.gt,
+}
+
 class SizeFilter(Filter):
     def __init__(self, size: int, operator: str):
+        if operator not in SIZE_OPERATORS:
+            raise ValueError(f"Unsupported size operator: {operator}")
         self.size = size
         self.operator = operator
+        self.compare = SIZE_OPERATORS[operator]
 
     def match(self, file: File) -> bool:
-        return eval(f"{file.size} {self.operator} {self.size}")
+        return self.compare(file.size, self.size)
 
 class ExtensionFilter(Filter):
     def __init__(self, extension: str):
@@ -85,37 +513,494 @@ class ExtensionFilter(Filter):
     def match(self, file: File) -> bool:
         return file.extension == self.extension
 
+class NamePatternFilter(Filter):
+    # Glob over the full file name ("*.tar.gz", "*report*"); substring search is "*text*"
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.regex = re.compile(fnmatch.translate(pattern))
+
+    def match(self, file: File) -> bool:
+        return self.regex.match(file.full_name()) is not None
+
+class AndFilter(Filter):
+    def __init__(self, filters: List[Filter]):
+        self.filters = filters
+
+    def match(self, file: File) -> bool:
+        return all(f.match(file) for f in self.filters)
+
+class OrFilter(Filter):
+    def __init__(self, filters: List[Filter]):
+        self.filters = filters
+
+    def match(self, file: File) -> bool:
+        return any(f.match(file) for f in self.filters)
+
+class NotFilter(Filter):
+    def __init__(self, filter: Filter):
+        self.filter = filter
+
+    def match(self, file: File) -> bool:
+        return not self.filter.match(file)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+INTERSECT_RATIO = 4  # An AND child is intersected only if at most this many times the running result
+SIZE_MERGE_THRESHOLD = 64  # Pending size changes merged by insort; more trigger one sort
+PARTIAL_HASH_SIZE = 64 * 1024
+
+def hash_file(real_path: str, limit: Optional[int] = None) -> str:
+    # Chunked so memory stays flat for huge files; `limit` hashes only the first bytes
+    digest = hashlib.blake2b(digest_size=32)
+    remaining = limit
+    with open(real_path, "rb") as f:
+        while remaining is None or remaining > 0:
+            chunk = f.read(HASH_CHUNK_SIZE if remaining is None else min(HASH_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest.hexdigest()
+
+class ContentRegexFilter(Filter):
+    # Searches file bytes through mmap, so the OS pages content in instead of Python copying it
+    def __init__(self, pattern: str, file_system: FileSystem):
+        self.pattern = pattern
+        self.regex = re.compile(pattern.encode())
+        self.file_system = file_system
+
+    def match(self, file: File) -> bool:
+        if file.size == 0:
+            return self.regex.search(b"") is not None
+        try:
+            with open(self.file_system.real_path(file.path()), "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                    return self.regex.search(content) is not None
+        except (OSError, ValueError):
+            return False
+
+class ContentHashFilter(Filter):
+    # Matches files whose content hash (hash_file) equals `digest`; `size` skips other sizes unread
+    def __init__(self, digest: str, file_system: FileSystem, size: Optional[int] = None):
+        self.digest = digest
+        self.file_system = file_system
+        self.size = size
+
+    def match(self, file: File) -> bool:
+        if self.size is not None and file.size != self.size:
+            return False
+        try:
+            return hash_file(self.file_system.real_path(file.path())) == self.digest
+        except OSError:
+            return False
+
+def find_duplicates(fs: FileSystem, min_size: int = 1, workers: Optional[int] = None) -> List[List[str]]:
+    """
+    Groups identical files of a scanned FileSystem. Candidates are narrowed by size (free,
+    from the sorted size index), then by a hash of the first PARTIAL_HASH_SIZE bytes, and
+    only the survivors are hashed in full, so most files are never read completely.
+    """
+    by_size: Dict[int, List[str]] = {}
+    sizes = fs.index.sizes
+    for size, path in sizes[bisect.bisect_left(sizes, min_size, key=size_key):]:
+        by_size.setdefault(size, []).append(path)
+    groups = [paths for paths in by_size.values() if len(paths) > 1]
+
+    def regroup(groups: List[List[str]], limit: Optional[int]) -> List[List[str]]:
+        paths = [path for group in groups for path in group]
+        digests = pool.map(lambda path: safe_hash(fs.real_path(path), limit), paths)
+        buckets: Dict[Tuple[int, str], List[str]] = {}
+        for path, digest in zip(paths, digests):
+            if digest is not None:
+                buckets.setdefault((fs.index.files[path].size, digest), []).append(path)
+        return [group for group in buckets.values() if len(group) > 1]
+
+    with ThreadPoolExecutor(max_workers=workers or default_workers()) as pool:
+        groups = regroup(groups, PARTIAL_HASH_SIZE)
+        small = [group for group in groups if fs.index.files[group[0]].size <= PARTIAL_HASH_SIZE]
+        large = [group for group in groups if fs.index.files[group[0]].size > PARTIAL_HASH_SIZE]
+        return small + regroup(large, None)
+
+def safe_hash(real_path: str, limit: Optional[int]) -> Optional[str]:
+    try:
+        return hash_file(real_path, limit)
+    except OSError:
+        return None
+
+Predicate = Callable[[File], bool]
+
+def filter_cost(f: Filter) -> int:
+    # Lower runs first: exact name checks reject almost everything, extensions reject most,
+    # size comparisons are cheap but rarely selective, composites cost what their children cost.
+    if isinstance(f, NameFilter):
+        return 1
+    if isinstance(f, ExtensionFilter):
+        return 2
+    if isinstance(f, SizeFilter):
+        return 3
+    if isinstance(f, NamePatternFilter):
+        return 4
+    if isinstance(f, NotFilter):
+        return filter_cost(f.filter)
+    if isinstance(f, (AndFilter, OrFilter)):
+        return sum(filter_cost(child) for child in f.filters) or 1
+    if isinstance(f, (ContentRegexFilter, ContentHashFilter)):
+        return 100  # Reads the file: always last
+    return 10
+
+def compile_filter(f: Filter) -> Predicate:
+    # Turns a filter tree into nested closures over plain attribute reads and operator
+    # functions, so matching a file never goes back through the Filter objects.
+    if isinstance(f, NameFilter):
+        name = f.name
+        return lambda file: file.name == name
+    if isinstance(f, ExtensionFilter):
+        extension = f.extension
+        return lambda file: file.extension == extension
+    if isinstance(f, SizeFilter):
+        compare, size = f.compare, f.size
+        return lambda file: compare(file.size, size)
+    if isinstance(f, NamePatternFilter):
+        regex_match = f.regex.match
+        return lambda file: regex_match(file.full_name()) is not None
+    if isinstance(f, NotFilter):
+        inner = compile_filter(f.filter)
+        return lambda file: not inner(file)
+    if isinstance(f, (AndFilter, OrFilter)):
+        predicates = [compile_filter(child) for child in sorted(f.filters, key=filter_cost)]
+        if isinstance(f, AndFilter):
+            if not predicates:
+                return lambda file: True
+            if len(predicates) == 1:
+                return predicates[0]
+            if len(predicates) == 2:
+                first, second = predicates
+                return lambda file: first(file) and second(file)
+
+            def all_match(file: File) -> bool:
+                for predicate in predicates:
+                    if not predicate(file):
+                        return False
+                return True
+            return all_match
+        if not predicates:
+            return lambda file: False
+        if len(predicates) == 1:
+            return predicates[0]
+        if len(predicates) == 2:
+            first, second = predicates
+            return lambda file: first(file) or second(file)
+
+        def any_match(file: File) -> bool:
+            for predicate in predicates:
+                if predicate(file):
+                    return True
+            return False
+        return any_match
+    return f.match
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class FileIndex:
+    # Secondary indexes over file paths, kept up to date by FileSystem on add/remove/resize.
+    def __init__(self):
+        self.files: Dict[str, File] = {}  # path -> File
+        self.by_extension: Dict[str, Set[str]] = {}
+        self.by_name: Dict[str, Set[str]] = {}
+        self.by_trigram: Dict[str, Set[str]] = {}  # trigram of the full file name -> paths
+        self._sizes: List[Tuple[int, str]] = []  # sorted (size, path); read through `sizes`
+        # Size changes not yet merged into _sizes. Bulk loads add millions of files one by one,
+        # so an insort per file (O(n) each) is replaced by a single sort on the next read.
+        self._added: Set[Tuple[int, str]] = set()
+        self._removed: Set[Tuple[int, str]] = set()
+
+    @property
+    def sizes(self) -> List[Tuple[int, str]]:
+        if self._added or self._removed:
+            if len(self._added) + len(self._removed) <= SIZE_MERGE_THRESHOLD:
+                for entry in self._removed:
+                    i = bisect.bisect_left(self._sizes, entry)
+                    if i < len(self._sizes) and self._sizes[i] == entry:
+                        del self._sizes[i]
+                for entry in self._added:
+                    bisect.insort(self._sizes, entry)
+            else:
+                if self._removed:
+                    self._sizes = [entry for entry in self._sizes if entry not in self._removed]
+                self._sizes.extend(self._added)
+                self._sizes.sort()  # One sorted run plus a tail: Timsort merges it in ~O(n)
+            self._added.clear()
+            self._removed.clear()
+        return self._sizes
+
+    def add(self, path: str, file: File):
+        self.files[path] = file
+        self.by_extension.setdefault(file.extension, set()).add(path)
+        self.by_name.setdefault(file.name, set()).add(path)
+        for trigram in trigrams(file.full_name()):
+            self.by_trigram.setdefault(trigram, set()).add(path)
+        self._add_size(file.size, path)
+
+    def remove(self, path: str, file: File):
+        del self.files[path]
+        self._discard(self.by_extension, file.extension, path)
+        self._discard(self.by_name, file.name, path)
+        for trigram in trigrams(file.full_name()):
+            self._discard(self.by_trigram, trigram, path)
+        self._remove_size(file.size, path)
+
+    def resize(self, path: str, file: File, size: int):
+        self._remove_size(file.size, path)
+        file.size = size
+        self._add_size(size, path)
+
+    def _add_size(self, size: int, path: str):
+        entry = (size, path)
+        if entry in self._removed:
+            self._removed.discard(entry)  # Still present in _sizes
+        else:
+            self._added.add(entry)
+
+    def _remove_size(self, size: int, path: str):
+        entry = (size, path)
+        if entry in self._added:
+            self._added.discard(entry)
+        else:
+            self._removed.add(entry)
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[str]], key: str, path: str):
+        paths = index.get(key)
+        if paths is not None:
+            paths.discard(path)
+            if not paths:
+                del index[key]
+
+    def _size_bounds(self, operator: str, size: int) -> Optional[Tuple[int, int]]:
+        # Slice of `sizes` holding the files that satisfy "size <operator> size"
+        sizes = self.sizes
+        low = bisect.bisect_left(sizes, size, key=size_key)
+        high = bisect.bisect_right(sizes, size, key=size_key)
+        return {"<": (0, low), "<=": (0, high), "==": (low, high),
+                ">=": (low, len(sizes)), ">": (high, len(sizes))}.get(operator)
+
+    def size_range(self, operator: str, size: int) -> Optional[Set[str]]:
+        bounds = self._size_bounds(operator, size)
+        if bounds is None:
+            return None
+        return {path for _, path in self.sizes[bounds[0]:bounds[1]]}
+
+    def pattern_candidates(self, pattern: str) -> Optional[Set[str]]:
+        # Every literal run of 3+ characters between wildcards must appear in the name
+        result = None
+        for literal in literal_runs(pattern):
+            for trigram in trigrams(literal):
+                paths = self.by_trigram.get(trigram, set())
+                result = set(paths) if result is None else result & paths
+                if not result:
+                    return set()
+        return result
+
+    def estimate(self, f: Filter) -> Optional[int]:
+        # Upper bound on the candidates of `f`, computed without building any set
+        if isinstance(f, NameFilter):
+            return len(self.by_name.get(f.name, ()))
+        if isinstance(f, ExtensionFilter):
+            return len(self.by_extension.get(f.extension, ()))
+        if isinstance(f, SizeFilter):
+            bounds = self._size_bounds(f.operator, f.size)
+            return None if bounds is None else bounds[1] - bounds[0]
+        if isinstance(f, NamePatternFilter):
+            counts = [len(self.by_trigram.get(trigram, ()))
+                      for literal in literal_runs(f.pattern) for trigram in trigrams(literal)]
+            return min(counts) if counts else None
+        if isinstance(f, AndFilter):
+            estimates = [e for e in map(self.estimate, f.filters) if e is not None]
+            return min(estimates) if estimates else None
+        if isinstance(f, OrFilter):
+            estimates = [self.estimate(child) for child in f.filters]
+            return None if None in estimates else sum(estimates)
+        return None
+
+    def candidates(self, f: Filter) -> Optional[Set[str]]:
+        # Paths that may match `f`, or None when the indexes cannot narrow it down.
+        if isinstance(f, NameFilter):
+            return set(self.by_name.get(f.name, ()))
+        if isinstance(f, ExtensionFilter):
+            return set(self.by_extension.get(f.extension, ()))
+        if isinstance(f, SizeFilter):
+            return self.size_range(f.operator, f.size)
+        if isinstance(f, NamePatternFilter):
+            return self.pattern_candidates(f.pattern)
+        if isinstance(f, AndFilter):
+            # Only the most selective children are materialised: a child is intersected when its
+            # estimate is within INTERSECT_RATIO of the running result, and any broader one
+            # (say "size >= 0") is left to the predicate that re-checks every candidate.
+            estimated = sorted((e, i) for i, e in enumerate(map(self.estimate, f.filters)) if e is not None)
+            result = None
+            for estimate, i in estimated:
+                if result is not None and estimate > INTERSECT_RATIO * len(result):
+                    break
+                paths = self.candidates(f.filters[i])
+                result = paths if result is None else result & paths
+                if not result:
+                    return set()
+            return result
+        if isinstance(f, OrFilter):
+            result = set()
+            for child in f.filters:
+                paths = self.candidates(child)
+                if paths is None:
+                    return None
+                result |= paths
+            return result
+        return None
+
+def literal_runs(pattern: str) -> List[str]:
+    # Runs of literal characters in an fnmatch pattern. A bracket class matches one unknown
+    # character, so it ends the current run like "?" does; an unclosed "[" is a literal.
+    runs, current = [], []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c in "*?":
+            runs.append("".join(current))
+            current = []
+        elif c == "[":
+            j = i + 1
+            if j < len(pattern) and pattern[j] == "!":
+                j += 1
+            if j < len(pattern) and pattern[j] == "]":  # A leading "]" is part of the class
+                j += 1
+            j = pattern.find("]", j)
+            if j == -1:
+                current.append(c)
+            else:
+                runs.append("".join(current))
+                current = []
+                i = j
+        else:
+            current.append(c)
+        i += 1
+    runs.append("".join(current))
+    return runs
+
+def size_key(entry: Tuple[int, str]) -> int:
+    return entry[0]
+
 class FileSearch:
-    def __init__(self, root_directory: Directory, filters: List[Filter], condition: str = "AND"):
+    def __init__(self, root_directory: Directory, filters: List[Filter], condition: str = "AND",
+                 index: Optional[FileIndex] = None):
         self.root_directory = root_directory
         self.filters = filters
         self.condition = condition
+        self.index = index
+        if condition == "AND":
+            self.expression = AndFilter(filters)
+        elif condition == "OR":
+            self.expression = OrFilter(filters)
+        else:
+            self.expression = None
+        self.predicate = compile_filter(self.expression) if self.expression else (lambda file: False)
 
     def check_conditions(self, file: File) -> bool:
-        if self.condition == "AND":
-            for f in self.filters:
-                if not f.match(file):
-                    return False
-            return True
-        elif self.condition == "OR":
-            for f in self.filters:
-                if f.match(file):
-                    return True
-            return False
-        return False
+        return self.predicate(file)
 
-    def find_files(self) -> List[str]:
-        queue = [self.root_directory]
-        result = []
+    def iter_matches(self) -> Iterator[Tuple[str, File]]:
+        if self.index is not None and self.expression is not None:
+            candidates = self.index.candidates(self.expression)
+            if candidates is not None:
+                return self._iter_candidates(candidates)
+        return self._iter_tree()
 
-        while queue:
-            current_directory = queue.pop(0)
-            for file in current_directory.files:
+    def _iter_candidates(self, candidates: Set[str]) -> Iterator[Tuple[str, File]]:
+        # Index candidates are re-checked with the full predicate and limited to the search root
+        root_path = self.root_directory.path()
+        prefix = root_path.rstrip("/") + "/"
+        for path in candidates:
+            if root_path != "/" and not path.startswith(prefix):
+                continue
+            file = self.index.files[path]
+            if self.predicate(file):
+                yield path, file
+
+    def _iter_tree(self) -> Iterator[Tuple[str, File]]:
+        # Lazy iterative DFS; paths are built while descending instead of via parent links
+        stack = deque([(self.root_directory.path(), self.root_directory)])
+        while stack:
+            current_path, current_directory = stack.pop()
+            for full_name, file in current_directory.files.items():
                 if self.check_conditions(file):
-                    result.append(file.name)
-            queue.extend(current_directory.subdirectories)
+                    yield join_path(current_path, full_name), file
+            for name, subdirectory in current_directory.subdirectories.items():
+                stack.append((join_path(current_path, name), subdirectory))
 
-        return result
+    def find_files(self, sort_by: Optional[str] = None, descending: bool = False,
+                   limit: Optional[int] = None, offset: int = 0) -> List[str]:
+        matches = self.iter_matches()
+        if sort_by is None:
+            stop = None if limit is None else offset + limit
+            return [path for path, _ in itertools.islice(matches, offset, stop)]
+        key = self._sort_key(sort_by)
+        if limit is None:
+            ordered = sorted(matches, key=lambda match: key(*match), reverse=descending)
+        else:
+            # Only offset + limit entries are ever held, in a bounded heap
+            select = heapq.nlargest if descending else heapq.nsmallest
+            ordered = select(offset + limit, matches, key=lambda match: key(*match))
+        return [path for path, _ in ordered[offset:]]
+
+    def count(self) -> int:
+        return sum(1 for _ in self.iter_matches())
+
+    def top_k(self, k: int, largest: bool = True) -> List[Tuple[str, File]]:
+        # Bounded heap during traversal: O(n log k) time and O(k) memory
+        select = heapq.nlargest if largest else heapq.nsmallest
+        return select(k, self.iter_matches(), key=lambda match: (match[1].size, match[0]))
+
+    def page(self, limit: int, cursor: Optional[Tuple] = None, sort_by: str = "path",
+             descending: bool = False) -> Tuple[List[Tuple[str, File]], Optional[Tuple]]:
+        """
+        Returns one page of matches and a cursor for the next one (None on the last page).
+        The cursor is the sort key of the last entry, so a page is resumable after changes
+        to the tree and never needs the earlier pages.
+        """
+        key = self._sort_key(sort_by)
+        keyed = ((key(path, file), path, file) for path, file in self.iter_matches())
+        if cursor is not None:
+            cursor = tuple(cursor)
+            if descending:
+                keyed = (entry for entry in keyed if entry[0] < cursor)
+            else:
+                keyed = (entry for entry in keyed if entry[0] > cursor)
+        select = heapq.nlargest if descending else heapq.nsmallest
+        selected = select(limit + 1, keyed, key=lambda entry: entry[0])
+        results = [(path, file) for _, path, file in selected[:limit]]
+        next_cursor = selected[limit - 1][0] if len(selected) > limit else None
+        return results, next_cursor
+
+    @staticmethod
+    def _sort_key(sort_by: str) -> Callable[[str, File], Tuple[Any, ...]]:
+        # Every key ends with the path so ordering is total and cursors are unambiguous
+        if sort_by == "size":
+            return lambda path, file: (file.size, path)
+        if sort_by == "name":
+            return lambda path, file: (file.full_name(), path)
+        if sort_by == "path":
+            return lambda path, file: (path,)
+        raise ValueError(f"Unsupported sort key: {sort_by}")
+
+    def iter_scan(self, source_root: str, file_system: Optional[FileSystem] = None,
+                  workers: Optional[int] = None) -> Iterator[Tuple[str, File]]:
+        # find-like streaming search over a real directory: matches are yielded while the
+        # parallel walk is still running. Pass file_system to also load the scanned tree.
+        for directory_path, files, subdirectory_names, mtime in scan_tree(source_root, workers):
+            if file_system is not None:
+                file_system.add_scanned(directory_path, files, subdirectory_names, mtime)
+            for file in files:
+                if self.predicate(file):
+                    yield join_path(directory_path, file.full_name()), file
     
 
 if __name__ == "__main__":
@@ -126,8 +1011,14 @@ if __name__ == "__main__":
     f4 = File("ghi", "py", 5)
     f5 = File("uvw", "java", 10)
 
-    root_directory = Directory("/", True)
-    root_directory.files = [f1, f2, f3, f4, f5]
+    fs = FileSystem()
+    fs.add_file("/", f1)
+    fs.add_file("/docs", f2)
+    fs.add_file("/docs", f3)
+    fs.add_file("/src/app", f4)
+    fs.add_file("/src", f5)
+    root_directory = fs.root
+    print("Resolve /src/app/ghi.py:", fs.resolve("/src/app/ghi.py").size)
 
     # Example searches
     res = FileSearch(root_directory, [NameFilter("abc")]).find_files()
@@ -139,3 +1030,55 @@ if __name__ == "__main__":
     res = FileSearch(root_directory, [ExtensionFilter("java"), SizeFilter(10, ">=")], "OR").find_files()
     print("Files with extension 'java' OR size >= 10:", res)
 
+    expression = AndFilter([OrFilter([ExtensionFilter("txt"), ExtensionFilter("py")]), NotFilter(SizeFilter(20, ">="))])
+    res = FileSearch(root_directory, [expression]).find_files()
+    print("Files with extension 'txt' or 'py' AND NOT size >= 20:", res)
+
+    # Ordered, bounded and paginated results
+    print("Two largest files:", [(path, file.size) for path, file in FileSearch(root_directory, []).top_k(2)])
+    print("Sorted by size, page 2 of 2-per-page:", FileSearch(root_directory, []).find_files("size", limit=2, offset=2))
+    print("Count of files with size >= 10:", FileSearch(root_directory, [SizeFilter(10, ">=")]).count())
+    cursor = None
+    while True:
+        results, cursor = FileSearch(root_directory, []).page(2, cursor, sort_by="name")
+        print("Page by name:", [path for path, _ in results])
+        if cursor is None:
+            break
+
+    # Index-backed searches
+    res = FileSearch(root_directory, [ExtensionFilter("txt"), SizeFilter(15, ">")], index=fs.index).find_files()
+    print("Indexed: extension 'txt' AND size > 15:", res)
+    res = FileSearch(root_directory, [NamePatternFilter("*ef*")], index=fs.index).find_files()
+    print("Indexed: name matching '*ef*':", res)
+    fs.resize("/src/app/ghi.py", 50)
+    res = sorted(FileSearch(fs.resolve("/src"), [SizeFilter(10, ">=")], index=fs.index).find_files())
+    print("Indexed: under /src with size >= 10 after resize:", res)
+
+    # Scan the real directory holding this script
+    here = os.path.dirname(os.path.abspath(__file__))
+    disk = FileSystem(here)
+    streamed = FileSearch(disk.root, [ExtensionFilter("py")]).iter_scan(here, file_system=disk)
+    print("Streamed .py files on disk:", sum(1 for _ in streamed))
+    print("Loaded tree has", len(disk.index.files), "files; largest:", disk.index.sizes[-1] if disk.index.sizes else None)
+
+    # Persist the scanned tree and refresh it incrementally
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "notes.txt"), "w") as f:
+            f.write("hello")
+        scanned = load_file_system(tmp)
+        save_snapshot(scanned, os.path.join(tmp, "snapshot.gz"))
+        restored = load_snapshot(os.path.join(tmp, "snapshot.gz"))
+        os.makedirs(os.path.join(tmp, "logs"))
+        with open(os.path.join(tmp, "logs", "app.log"), "w") as f:
+            f.write("started")
+        print("Refresh after adding logs/app.log:", refresh(restored))
+        print("Found after refresh:", FileSearch(restored.root, [ExtensionFilter("log")], index=restored.index).find_files())
+
+        # Content filters and duplicate detection
+        with open(os.path.join(tmp, "logs", "copy.log"), "w") as f:
+            f.write("started")
+        refresh(restored)
+        res = FileSearch(restored.root, [ExtensionFilter("log"), ContentRegexFilter(r"start\w+", restored)]).find_files()
+        print("Logs containing 'start...':", sorted(res))
+        print("Duplicate groups:", [sorted(group) for group in find_duplicates(restored)])
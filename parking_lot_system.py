@@ -5,22 +5,53 @@ LLD PARKING LOT SYSTEM
 Classes:
 1. Size (Enum): Enumerates the sizes of parking spots and vehicles.
    - Methods:
-     - get(size): Converts a size string to a corresponding Enum value.
+     - get(size): Converts a size string (or Size) to a corresponding Enum value via a precomputed table.
 
 2. Vehicle: Represents vehicles that use the parking lot.
    - Attributes: id, numberplate, size, parked_spot
 
 3. ParkingSpot: Represents individual parking spots within the lot.
-   - Attributes: id, size, vehicle
+   - Attributes: id, size, floor, distance (to the entrance), vehicle
 
-4. ParkingLot: Manages the operations of parking vehicles.
-   - Attributes: vehicleid, parkingspotid, parkingspots, vehicles, available_parking_spots
+4. AllocationPolicy (Enum): BEST_FIT (smallest compatible size, then nearest) or NEAREST_FIRST (nearest compatible spot).
+
+5. SpotAllocator: Keeps free spots in per-size, per-floor heaps keyed by distance.
+   - Methods: release(spot), allocate(size, floor) -> spot or None, free_count(size)
+   - Each size has its own lock, so allocations for different sizes run in parallel.
+
+6. SpotHold: A reservation that keeps a spot out of circulation until confirmed, cancelled or expired.
+   - Attributes: id, spot, expires_at, status
+
+7. OccupancyEvent / OccupancyLog: Append-only journal of park/unpark/hold events.
+   - Keeps O(1) free-spot counters per size, floor and (size, floor); subscribe(callback) / stream() feed display boards.
+   - save_snapshot(path) and load(snapshot_path) + journal replay rebuild the state after a crash.
+
+8. Ticket / RateTable: Timestamped tickets and pricing (per-size hourly rates, time-of-day tiers, daily caps).
+   - RateTable methods: fee(size, entry, exit), bulk_fees(sizes, entries, exits) (NumPy-vectorized), settle(tickets)
+
+9. ParkingLot: Manages the operations of parking vehicles. Safe to call from many gates at once.
+   - Attributes: vehicleid, parkingspotid, parkingspots, vehicles, allocator, holds, log, rates, tickets, closed_tickets, metrics
    - Methods:
-     - create_spot(size): Creates a parking spot of a given size.
+     - create_spot(size, floor, distance): Creates a parking spot of a given size.
      - create_vehicle(numberplate, size): Creates a vehicle of a given size.
-     - find_spot(vehicle): Finds an available parking spot for a vehicle based on its size.
-     - park_vehicle(vehicle): Parks a vehicle in an appropriate spot.
+     - find_spot(vehicle, floor): Allocates an available parking spot for a vehicle based on its size and the policy; raises NoSpotAvailable.
+     - park_vehicle(vehicle): Parks a vehicle in an appropriate spot; raises VehicleAlreadyParked if it is parked already.
      - remove_vehicle(vehicle): Removes a vehicle from its spot and makes the spot available again.
+     - reserve(size, hold_seconds, floor) / confirm(hold, vehicle) / cancel_hold(hold) / expire_holds(now): Timed spot holds; reserve raises NoSpotAvailable when full.
+     - free_spots(size, floor): Constant-time availability from the occupancy log.
+     - recover(log_path, snapshot_path): Rebuilds a lot from a snapshot and the journal.
+
+10. FreeBitset / CompactParkingLot: Array-backed spot state for very large lots.
+   - Spot sizes in a byte array, occupant vehicle ids in an int64 array, one free-slot bitset per size.
+   - Methods: create_spots(size, count), park_vehicle(vehicle) -> spot index, remove_vehicle(vehicle), free_spots(size)
+
+11. AsyncParkingGate: asyncio gate API (park, leave, reserve, confirm) over a shared ParkingLot.
+   - run_gate_load_test(gates, cycles_per_gate, threads) reports throughput and p99 latency.
+
+12. ParkingError / NoSpotAvailable / VehicleNotParked / VehicleAlreadyParked: Typed errors raised instead of printed.
+
+13. MetricsSink / InMemoryMetrics: Pluggable observer for ParkingLot (no-op by default, so the hot path does no I/O).
+   - Methods: increment(name), observe(name, seconds) [latency histogram], failure(operation, reason), percentile(name, q)
 
 Usage:
 - System initialization with counts of small, medium, and large spots.
@@ -31,8 +62,92 @@ Usage:
 """
 
 
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import os
+import queue
+import random
+import threading
+import time
+from array import array
+from collections import Counter, defaultdict
 from enum import Enum
 
+try:
+    import numpy as np
+except ImportError:  # Bulk billing falls back to a pure-Python loop
+    np = None
+
+
+class ParkingError(Exception):
+    pass
+
+class NoSpotAvailable(ParkingError):
+    def __init__(self, size, floor=None):
+        where = '' if floor is None else f' on floor {floor}'
+        super().__init__(f'Compatible parking spot is not available for {size.name}{where}')
+        self.size = size
+        self.floor = floor
+
+class VehicleNotParked(ParkingError):
+    def __init__(self):
+        super().__init__('Vehicle is not in a parking spot')
+
+class VehicleAlreadyParked(ParkingError):
+    def __init__(self):
+        super().__init__('Vehicle is already parked')
+
+
+class MetricsSink:
+    # No-op default: the allocation path reports unconditionally and pays one method call
+    def increment(self, name, value=1):
+        pass
+
+    def observe(self, name, seconds):
+        pass
+
+    def failure(self, operation, reason):
+        pass
+
+class InMemoryMetrics(MetricsSink):
+    """
+    Counters, failure reasons and latency histograms kept in memory. Latencies are counted
+    in power-of-two microsecond buckets, so recording is O(1) and percentiles are upper bounds.
+    """
+    def __init__(self):
+        self.counters = Counter()
+        self.failures = Counter()  # (operation, reason) -> count
+        self.histograms = defaultdict(Counter)  # name -> {bucket: count}
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def observe(self, name, seconds):
+        bucket = int(seconds * 1e6).bit_length()  # Bucket b holds [2**(b-1), 2**b) us
+        with self._lock:
+            self.histograms[name][bucket] += 1
+
+    def failure(self, operation, reason):
+        with self._lock:
+            self.failures[operation, reason] += 1
+
+    def percentile(self, name, q):
+        histogram = self.histograms.get(name)
+        if not histogram:
+            return 0.0
+        rank = q * sum(histogram.values())
+        seen = 0
+        for bucket in sorted(histogram):
+            seen += histogram[bucket]
+            if seen >= rank:
+                break
+        return (1 << bucket) / 1e6
+
 class Size(Enum):
     SMALL = 0
     MEDIUM = 1
@@ -40,15 +155,25 @@ class Size(Enum):
 
     @staticmethod
     def get(size):
-        if size.lower() == 'small':
-            return Size.SMALL
-        elif size.lower() == 'medium':
-            return Size.MEDIUM
-        elif size.lower() == 'large':
-            return Size.LARGE
-        raise ValueError(f'No size matching with "{size}"')
+        if isinstance(size, Size):
+            return size
+        found = SIZES_BY_NAME.get(size)
+        if found is None and isinstance(size, str):
+            found = SIZES_BY_NAME.get(size.lower())
+        if found is None:
+            raise ValueError(f'No size matching with "{size}"')
+        return found
+
+SIZES_BY_NAME = {size.name.lower(): size for size in Size}
+SIZES_BY_NAME.update({size.name: size for size in Size})
+
+class AllocationPolicy(Enum):
+    BEST_FIT = 0
+    NEAREST_FIRST = 1
 
 class Vehicle:
+    CLAIMED = object()  # parked_spot while a gate is allocating for the vehicle
+
     def __init__(self, id, numberplate, size):
         self.id = id
         self.numberplate = numberplate
@@ -57,67 +182,774 @@ class Vehicle:
 
 
 class ParkingSpot:
-    def __init__(self, id, size):
+    def __init__(self, id, size, floor=0, distance=0):
         self.id = id
         self.size = Size.get(size)
+        self.floor = floor
+        self.distance = distance
         self.vehicle = None
 
     def is_available(self):
         return self.vehicle is None
 
 
+class SpotAllocator:
+    def __init__(self, policy=AllocationPolicy.BEST_FIT):
+        self.policy = policy
+        # size value -> floor -> heap of (distance, spot id, spot); ids keep entries unique
+        self.free = [{} for _ in Size]
+        self.free_counts = [0 for _ in Size]
+        # One lock per size: gates parking different sizes never contend
+        self.locks = [threading.Lock() for _ in Size]
+
+    def release(self, spot):
+        with self.locks[spot.size.value]:
+            self._push(spot)
+
+    def _push(self, spot):
+        heapq.heappush(self.free[spot.size.value].setdefault(spot.floor, []), (spot.distance, spot.id, spot))
+        self.free_counts[spot.size.value] += 1
+
+    def free_count(self, size):
+        return self.free_counts[Size.get(size).value]
+
+    def _nearest(self, size_value, floor):
+        # Heap head per floor: O(floors) to compare, O(log n) to pop afterwards
+        floors = self.free[size_value]
+        if floor is not None:
+            heap = floors.get(floor)
+            return heap if heap else None
+        best = None
+        for heap in floors.values():
+            if heap and (best is None or heap[0] < best[0]):
+                best = heap
+        return best
+
+    def _pop(self, heap, size_value):
+        self.free_counts[size_value] -= 1
+        return heapq.heappop(heap)[2]
+
+    def allocate(self, size, floor=None):
+        # With a floor, spots on that floor are preferred before falling back to any floor
+        preferences = [floor, None] if floor is not None else [None]
+        size_values = range(size.value, len(Size))
+        if self.policy == AllocationPolicy.BEST_FIT:
+            for preferred in preferences:
+                for size_value in size_values:
+                    with self.locks[size_value]:
+                        heap = self._nearest(size_value, preferred) if self.free_counts[size_value] else None
+                        if heap is not None:
+                            return self._pop(heap, size_value)
+            return None
+
+        # NEAREST_FIRST compares across sizes, so it holds every compatible size lock,
+        # always acquired smallest size first to rule out deadlocks.
+        locks = [self.locks[size_value] for size_value in size_values]
+        for lock in locks:
+            lock.acquire()
+        try:
+            for preferred in preferences:
+                best = None
+                for size_value in size_values:
+                    heap = self._nearest(size_value, preferred) if self.free_counts[size_value] else None
+                    if heap is not None and (best is None or heap[0][:2] < best[0][0][:2]):
+                        best = (heap, size_value)
+                if best is not None:
+                    return self._pop(*best)
+            return None
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+
+class OccupancyEvent:
+    # kind: 'add' (new spot), 'park', 'unpark', 'hold', 'confirm' (hold -> parked), 'release' (hold dropped)
+    def __init__(self, seq, kind, spot_id, size, floor, distance=0, vehicle_id=None, numberplate=None,
+                 vehicle_size=None, timestamp=None):
+        self.seq = seq
+        self.kind = kind
+        self.spot_id = spot_id
+        self.size = size
+        self.floor = floor
+        self.distance = distance
+        self.vehicle_id = vehicle_id
+        self.numberplate = numberplate
+        self.vehicle_size = vehicle_size
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    def to_dict(self):
+        return {'seq': self.seq, 'kind': self.kind, 'spot_id': self.spot_id, 'size': self.size.name,
+                'floor': self.floor, 'distance': self.distance, 'vehicle_id': self.vehicle_id,
+                'numberplate': self.numberplate,
+                'vehicle_size': self.vehicle_size.name if self.vehicle_size else None,
+                'timestamp': self.timestamp}
+
+    @staticmethod
+    def from_dict(data):
+        return OccupancyEvent(data['seq'], data['kind'], data['spot_id'], Size.get(data['size']), data['floor'],
+                              data['distance'], data['vehicle_id'], data['numberplate'],
+                              Size.get(data['vehicle_size']) if data['vehicle_size'] else None, data['timestamp'])
+
+
+class OccupancyLog:
+    """
+    Append-only journal of occupancy events with O(1) free-spot counters per size, per floor
+    and per (size, floor). It also keeps the per-spot state the events imply, which is what
+    snapshots store; recovery loads a snapshot and replays the journal written after it.
+    """
+    FREE, OCCUPIED, HELD = 'free', 'occupied', 'held'
+
+    def __init__(self, path=None):
+        self.path = path
+        self.seq = 0
+        self.events = []  # Events since the last snapshot
+        # spot id -> [size, floor, distance, status, vehicle_id, numberplate, vehicle_size, entry_time]
+        self.spots = {}
+        self.free_by_size_floor = {}
+        self.free_by_size = {size: 0 for size in Size}
+        self.free_by_floor = {}
+        self.free_total = 0
+        self.subscribers = []  # Replaced, never mutated, so writers iterate it without the lock
+        self.dropped_events = 0  # Events a full stream() queue could not take
+        self._lock = threading.Lock()
+        self._file = open(path, 'ab') if path else None  # Buffered writer with its own lock
+
+    def append(self, kind, spot, vehicle=None, timestamp=None):
+        with self._lock:
+            self.seq += 1
+            event = OccupancyEvent(self.seq, kind, spot.id, spot.size, spot.floor, spot.distance,
+                                   vehicle.id if vehicle else None, vehicle.numberplate if vehicle else None,
+                                   vehicle.size if vehicle else None, timestamp)
+            self.apply(event)
+            self.events.append(event)
+            if self._file:
+                # Buffered in seq order here; the flush syscall happens after the lock is released
+                self._file.write((json.dumps(event.to_dict()) + '\n').encode('utf-8'))
+            subscribers = self.subscribers
+        if self._file:
+            self._file.flush()
+        for callback in subscribers:
+            callback(event)
+        return event
+
+    def apply(self, event):
+        if event.kind == 'add':
+            self.spots[event.spot_id] = [event.size, event.floor, event.distance, self.FREE, None, None, None, None]
+            self._count(event.size, event.floor, 1)
+            return
+        state = self.spots[event.spot_id]
+        was_free = state[3] == self.FREE
+        if event.kind in ('park', 'confirm'):
+            state[3:] = [self.OCCUPIED, event.vehicle_id, event.numberplate, event.vehicle_size, event.timestamp]
+        elif event.kind == 'hold':
+            state[3] = self.HELD
+        elif event.kind in ('unpark', 'release'):
+            state[3:] = [self.FREE, None, None, None, None]
+        is_free = state[3] == self.FREE
+        if was_free != is_free:
+            self._count(event.size, event.floor, 1 if is_free else -1)
+
+    def _count(self, size, floor, delta):
+        key = (size, floor)
+        self.free_by_size_floor[key] = self.free_by_size_floor.get(key, 0) + delta
+        self.free_by_size[size] += delta
+        self.free_by_floor[floor] = self.free_by_floor.get(floor, 0) + delta
+        self.free_total += delta
+
+    def free_spots(self, size=None, floor=None):
+        if size is None and floor is None:
+            return self.free_total
+        if floor is None:
+            return self.free_by_size[Size.get(size)]
+        if size is None:
+            return self.free_by_floor.get(floor, 0)
+        return self.free_by_size_floor.get((Size.get(size), floor), 0)
+
+    def subscribe(self, callback):
+        # Callbacks run in the writer's thread outside the log lock, so events from different
+        # gates can arrive slightly out of order (use event.seq); keep them short and non-blocking
+        with self._lock:
+            self.subscribers = self.subscribers + [callback]
+        return lambda: self._unsubscribe(callback)
+
+    def _unsubscribe(self, callback):
+        with self._lock:
+            self.subscribers = [subscriber for subscriber in self.subscribers if subscriber is not callback]
+
+    def stream(self, maxsize=0):
+        # Thread-safe queue for display boards that consume events on their own thread. A full
+        # queue never blocks a gate: the event is dropped and counted in dropped_events.
+        events = queue.Queue(maxsize)
+
+        def offer(event):
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                with self._lock:
+                    self.dropped_events += 1
+
+        self.subscribe(offer)
+        return events
+
+    def save_snapshot(self, path):
+        with self._lock:
+            state = {'seq': self.seq, 'spots': [
+                [spot_id, size.name, floor, distance, status, vehicle_id, numberplate,
+                 vehicle_size.name if vehicle_size else None, entry_time]
+                for spot_id, (size, floor, distance, status, vehicle_id, numberplate, vehicle_size, entry_time)
+                in self.spots.items()]}
+            self.events = []
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)  # Atomic, so a crash never leaves half a snapshot
+
+    def load(self, snapshot_path=None):
+        # Rebuilds the state from a snapshot plus every journal event written after it
+        if snapshot_path and os.path.exists(snapshot_path):
+            with open(snapshot_path, encoding='utf-8') as f:
+                state = json.load(f)
+            self.seq = state['seq']
+            for spot_id, size, floor, distance, status, vehicle_id, numberplate, vehicle_size, entry_time \
+                    in state['spots']:
+                size = Size.get(size)
+                self.spots[spot_id] = [size, floor, distance, status, vehicle_id, numberplate,
+                                       Size.get(vehicle_size) if vehicle_size else None, entry_time]
+                if status == self.FREE:
+                    self._count(size, floor, 1)
+        if self.path and os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        event = OccupancyEvent.from_dict(json.loads(line))
+                    except ValueError:
+                        break  # Torn last line from a crash mid-write
+                    if event.seq > self.seq:
+                        self.apply(event)
+                        self.seq = event.seq
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+class Ticket:
+    def __init__(self, id, vehicle, spot, entry_time):
+        self.id = id
+        self.vehicle_id = vehicle.id
+        self.numberplate = vehicle.numberplate
+        self.size = spot.size  # Billed by the spot used, not the vehicle
+        self.spot_id = spot.id
+        self.entry_time = entry_time
+        self.exit_time = None
+        self.fee = None
+
+
+class RateTable:
+    """
+    Per-size hourly rates with time-of-day multipliers, rounding up to a billing increment
+    and a cap per started 24 hours.
+
+    Fees integrate the rate over the stay: charge(entry, exit) = F(exit) - F(entry), where
+    F(t) is the cumulative charge since the epoch. F is a per-minute prefix sum over one day
+    plus whole days, so a ticket costs a few array lookups and settlement vectorizes cleanly.
+    """
+    MINUTES_PER_DAY = 24 * 60
+
+    def __init__(self, hourly_rates, daily_caps=None, tiers=None, increment_minutes=15, utc_offset_hours=0):
+        self.hourly_rates = {Size.get(size): rate for size, rate in hourly_rates.items()}
+        self.daily_caps = {Size.get(size): cap for size, cap in (daily_caps or {}).items()}
+        self.tiers = tiers or []  # (start_hour, end_hour, multiplier), end exclusive
+        self.increment = increment_minutes * 60
+        self.utc_offset = utc_offset_hours * 3600
+        # per_minute[size][m] is the charge for minute m of the day; cumulative[size][m] the charge before it
+        self.per_minute = []
+        self.cumulative = []
+        for size in Size:
+            rate = self.hourly_rates.get(size, 0.0) / 60
+            minutes = [rate * self.multiplier(m // 60) for m in range(self.MINUTES_PER_DAY)]
+            self.per_minute.append(minutes)
+            self.cumulative.append(list(itertools.accumulate(minutes, initial=0.0)))
+        self.day_totals = [cumulative[-1] for cumulative in self.cumulative]
+        self.caps = [self.daily_caps.get(size, math.inf) for size in Size]
+
+    def multiplier(self, hour):
+        for start, end, multiplier in self.tiers:
+            if start <= hour < end:
+                return multiplier
+        return 1.0
+
+    def _charge_until(self, size_value, t):
+        t += self.utc_offset
+        day, second = divmod(t, 86400)
+        minute = int(second // 60)
+        return (day * self.day_totals[size_value] + self.cumulative[size_value][minute]
+                + (second % 60) / 60 * self.per_minute[size_value][minute])
+
+    def fee(self, size, entry_time, exit_time):
+        size_value = Size.get(size).value
+        duration = max(exit_time - entry_time, 0)
+        billed = math.ceil(duration / self.increment) * self.increment
+        charge = self._charge_until(size_value, entry_time + billed) - self._charge_until(size_value, entry_time)
+        cap = self.caps[size_value] * max(math.ceil(billed / 86400), 1)
+        return round(float(min(charge, cap)), 2)
+
+    def bulk_fees(self, size_values, entry_times, exit_times):
+        # Vectorized fee() over whole arrays: one pass of NumPy ops, no per-ticket Python work
+        if np is None:
+            return [self.fee(Size(size_value), entry, exit)
+                    for size_value, entry, exit in zip(size_values, entry_times, exit_times)]
+        size_values = np.asarray(size_values, dtype=np.int64)
+        entry_times = np.asarray(entry_times, dtype=np.float64)
+        exit_times = np.asarray(exit_times, dtype=np.float64)
+        per_minute = np.asarray(self.per_minute)
+        cumulative = np.asarray(self.cumulative)
+        day_totals = np.asarray(self.day_totals)
+
+        def charge_until(t):
+            t = t + self.utc_offset
+            day, second = np.divmod(t, 86400)
+            minute = (second // 60).astype(np.int64)
+            return (day * day_totals[size_values] + cumulative[size_values, minute]
+                    + (second % 60) / 60 * per_minute[size_values, minute])
+
+        duration = np.maximum(exit_times - entry_times, 0)
+        billed = np.ceil(duration / self.increment) * self.increment
+        charge = charge_until(entry_times + billed) - charge_until(entry_times)
+        cap = np.asarray(self.caps)[size_values] * np.maximum(np.ceil(billed / 86400), 1)
+        return np.round(np.minimum(charge, cap), 2)
+
+    def settle(self, tickets):
+        # End-of-day batch: prices every closed ticket at once and returns the total
+        tickets = [ticket for ticket in tickets if ticket.exit_time is not None]
+        fees = self.bulk_fees([ticket.size.value for ticket in tickets],
+                              [ticket.entry_time for ticket in tickets],
+                              [ticket.exit_time for ticket in tickets])
+        for ticket, fee in zip(tickets, fees):
+            ticket.fee = float(fee)
+        return round(float(sum(fees)), 2)
+
+
+class SpotHold:
+    def __init__(self, id, spot, expires_at):
+        self.id = id
+        self.spot = spot
+        self.expires_at = expires_at
+        self.status = 'held'  # held -> confirmed | cancelled | expired
+
+
 class ParkingLot:
-    def __init__(self, small_count, medium_count, large_count):
+    def __init__(self, small_count, medium_count, large_count, policy=AllocationPolicy.BEST_FIT, log_path=None,
+                 rates=None, clock=time.time, metrics=None):
         self.vehicleid = 0
         self.parkingspotid = 0
         self.parkingspots = []
         self.vehicles = {}
-        self.available_parking_spots = [[], [], []]
+        self.allocator = SpotAllocator(policy)
+        self._vehicle_lock = threading.Lock()  # Only guards id assignment, not allocation
+        self.holds = {}
+        self._hold_ids = itertools.count()
+        self._hold_heap = []  # (expires_at, hold id)
+        self._hold_lock = threading.Lock()
+        self.log = OccupancyLog(log_path)
+        self.rates = rates
+        self.clock = clock
+        self._ticket_ids = itertools.count()
+        self.tickets = {}  # vehicle id -> open Ticket
+        self.closed_tickets = []
+        self.metrics = metrics if metrics is not None else MetricsSink()
 
         for _ in range(small_count):
-            self.create_spot('small')
+            self.create_spot(Size.SMALL)
         for _ in range(medium_count):
-            self.create_spot('medium')
+            self.create_spot(Size.MEDIUM)
         for _ in range(large_count):
-            self.create_spot('large')
+            self.create_spot(Size.LARGE)
 
-    def create_spot(self, size):
-        p = ParkingSpot(self.parkingspotid, size)
+    def create_spot(self, size, floor=0, distance=None):
+        # Without an explicit distance, spots are ordered by creation
+        if distance is None:
+            distance = self.parkingspotid
+        p = ParkingSpot(self.parkingspotid, size, floor, distance)
         self.parkingspots.append(p)
-        self.available_parking_spots[Size.get(size).value].append(p)
+        self.log.append('add', p)
+        self.allocator.release(p)
         self.parkingspotid += 1
+        return p
+
+    @staticmethod
+    def recover(log_path, snapshot_path=None, policy=AllocationPolicy.BEST_FIT, rates=None, clock=time.time,
+                metrics=None):
+        """
+        Rebuilds a lot after a crash from the last snapshot and the journal. Holds are
+        short-lived, so spots that were held when the process died are released. Open
+        tickets are reissued with the entry time of each vehicle's park or confirm event.
+        """
+        lot = ParkingLot(0, 0, 0, policy=policy, rates=rates, clock=clock, metrics=metrics)
+        lot.log.close()
+        lot.log = OccupancyLog(log_path)
+        lot.log.load(snapshot_path)
+        held = []
+        for spot_id in sorted(lot.log.spots):
+            size, floor, distance, status, vehicle_id, numberplate, vehicle_size, entry_time = lot.log.spots[spot_id]
+            spot = ParkingSpot(spot_id, size, floor, distance)
+            lot.parkingspots.append(spot)
+            if status == OccupancyLog.OCCUPIED:
+                vehicle = Vehicle(vehicle_id, numberplate, vehicle_size)
+                vehicle.parked_spot = spot
+                spot.vehicle = vehicle
+                lot.vehicles[vehicle_id] = vehicle
+                lot.vehicleid = max(lot.vehicleid, vehicle_id + 1)
+                lot.tickets[vehicle_id] = Ticket(next(lot._ticket_ids), vehicle, spot, entry_time)
+            elif status == OccupancyLog.HELD:
+                held.append(spot)
+            else:
+                lot.allocator.release(spot)
+        for spot in held:
+            lot.log.append('release', spot)
+            lot.allocator.release(spot)
+        lot.parkingspotid = max(lot.log.spots, default=-1) + 1
+        return lot
+
+    def free_spots(self, size=None, floor=None):
+        return self.log.free_spots(size, floor)
 
     def create_vehicle(self, numberplate, size):
-        v = Vehicle(self.vehicleid, numberplate, size)
+        with self._vehicle_lock:
+            v = Vehicle(self.vehicleid, numberplate, size)
+            self.vehicleid += 1
         self.vehicles[v.id] = v
-        self.vehicleid += 1
         return v
 
-    def find_spot(self, vehicle):
+    def find_spot(self, vehicle, floor=None):
+        self._expire_due_holds()
+        start = time.perf_counter()
+        parking_spot = self.allocator.allocate(vehicle.size, floor)
+        self.metrics.observe('allocate', time.perf_counter() - start)
+        if parking_spot is None:
+            self.metrics.failure('allocate', 'lot_full' if floor is None else 'floor_full')
+            raise NoSpotAvailable(vehicle.size, floor)
+        return parking_spot
+
+    def _claim(self, vehicle, operation):
+        # Compare-and-set on parked_spot, so two gates handling the same vehicle cannot both
+        # allocate; the loser fails before taking a spot that would be overwritten and leaked
+        with self.allocator.locks[vehicle.size.value]:
+            claimed = vehicle.parked_spot is None
+            if claimed:
+                vehicle.parked_spot = Vehicle.CLAIMED
+        if not claimed:
+            self.metrics.failure(operation, 'already_parked')
+            raise VehicleAlreadyParked()
+
+    def park_vehicle(self, vehicle, floor=None):
+        # The allocator hands each spot to exactly one caller, so assigning it needs no lock
+        self._claim(vehicle, 'park')
+        try:
+            spot = self.find_spot(vehicle, floor)
+        except NoSpotAvailable:
+            vehicle.parked_spot = None
+            raise
+        vehicle.parked_spot = spot
+        spot.vehicle = vehicle
+        ticket = self._open_ticket(vehicle, spot)
+        self.log.append('park', spot, vehicle, ticket.entry_time)
+        self.metrics.increment('park')
+        return spot
+
+    def _open_ticket(self, vehicle, spot):
+        ticket = self.tickets[vehicle.id] = Ticket(next(self._ticket_ids), vehicle, spot, self.clock())
+        return ticket
+
+    def _close_ticket(self, vehicle):
+        ticket = self.tickets.pop(vehicle.id, None)
+        if ticket is not None:
+            ticket.exit_time = self.clock()
+            if self.rates is not None:
+                ticket.fee = self.rates.fee(ticket.size, ticket.entry_time, ticket.exit_time)
+            self.closed_tickets.append(ticket)
+        return ticket
+
+    def remove_vehicle(self, vehicle):
+        spot = vehicle.parked_spot
+        if spot is not None and spot is not Vehicle.CLAIMED:
+            # Check and release under the spot's size lock so two gates cannot free it twice
+            with self.allocator.locks[spot.size.value]:
+                if spot.vehicle is vehicle:
+                    # Journal before the spot is reusable, so its next 'park' is always later
+                    self.log.append('unpark', spot, vehicle)
+                    spot.vehicle = None
+                    vehicle.parked_spot = None
+                    self._close_ticket(vehicle)
+                    self.allocator._push(spot)
+                    self.vehicles.pop(vehicle.id, None)
+                    self.metrics.increment('unpark')
+                    return spot
+        self.metrics.failure('unpark', 'not_parked')
+        raise VehicleNotParked()
+
+    def reserve(self, size, hold_seconds=300, floor=None):
+        # Takes a spot out of circulation until confirm(), cancel_hold() or the hold expires
+        self._expire_due_holds()
+        start = time.perf_counter()
+        spot = self.allocator.allocate(Size.get(size), floor)
+        self.metrics.observe('allocate', time.perf_counter() - start)
+        if spot is None:
+            self.metrics.failure('reserve', 'lot_full' if floor is None else 'floor_full')
+            raise NoSpotAvailable(Size.get(size), floor)
+        self.metrics.increment('hold')
+        hold = SpotHold(next(self._hold_ids), spot, time.monotonic() + hold_seconds)
+        self.log.append('hold', spot)
+        with self._hold_lock:
+            self.holds[hold.id] = hold
+            heapq.heappush(self._hold_heap, (hold.expires_at, hold.id))
+        return hold
+
+    def confirm(self, hold, vehicle):
+        self._claim(vehicle, 'confirm')
+        with self._hold_lock:
+            if hold.status != 'held' or hold.expires_at <= time.monotonic():
+                vehicle.parked_spot = None
+                return False
+            hold.status = 'confirmed'
+            del self.holds[hold.id]
+        vehicle.parked_spot = hold.spot
+        hold.spot.vehicle = vehicle
+        ticket = self._open_ticket(vehicle, hold.spot)
+        self.log.append('confirm', hold.spot, vehicle, ticket.entry_time)
+        return True
+
+    def cancel_hold(self, hold):
+        with self._hold_lock:
+            if hold.status != 'held':
+                return False
+            hold.status = 'cancelled'
+            del self.holds[hold.id]
+        self.log.append('release', hold.spot)
+        self.allocator.release(hold.spot)
+        return True
+
+    def expire_holds(self, now=None):
+        now = time.monotonic() if now is None else now
+        expired = []
+        with self._hold_lock:
+            while self._hold_heap and self._hold_heap[0][0] <= now:
+                _, hold_id = heapq.heappop(self._hold_heap)
+                hold = self.holds.pop(hold_id, None)
+                if hold is not None and hold.status == 'held':
+                    hold.status = 'expired'
+                    expired.append(hold)
+        for hold in expired:
+            self.log.append('release', hold.spot)
+            self.allocator.release(hold.spot)
+        return len(expired)
+
+    def _expire_due_holds(self):
+        # Lock-free peek on the fast path; the lock is only taken when something is due
         try:
-            for i in range(vehicle.size.value, 3):
-                if self.available_parking_spots[i]:
-                    parking_spot = self.available_parking_spots[i].pop()
-                    return parking_spot
-            raise Exception('Compatible parking spot is not available')
-        except Exception as e:
-            print(f"Error: {e}")
+            due = self._hold_heap[0][0] <= time.monotonic()
+        except IndexError:
+            return
+        if due:
+            self.expire_holds()
+
+
+class FreeBitset:
+    # Free slots of one size as a bitset over 64-bit words; `hint` is the lowest word that
+    # may still have a set bit, so finding a free slot is a short word scan plus a bit trick.
+    def __init__(self, capacity=0):
+        self.words = array('Q', bytes(8 * ((capacity + 63) // 64)))
+        self.hint = len(self.words)
+        self.count = 0
+
+    def grow(self, capacity):
+        missing = (capacity + 63) // 64 - len(self.words)
+        if missing > 0:
+            self.words.extend(array('Q', bytes(8 * missing)))
+
+    def add(self, index):
+        word = index >> 6
+        self.words[word] |= 1 << (index & 63)
+        self.count += 1
+        if word < self.hint:
+            self.hint = word
+
+    def add_range(self, start, stop):
+        # Used when a block of slots is created at once: whole words are filled directly
+        index = start
+        while index < stop and index & 63:
+            self.add(index)
+            index += 1
+        while index + 64 <= stop:
+            self.words[index >> 6] = 0xFFFFFFFFFFFFFFFF
+            self.hint = min(self.hint, index >> 6)
+            self.count += 64
+            index += 64
+        while index < stop:
+            self.add(index)
+            index += 1
+
+    def pop_first(self):
+        words = self.words
+        word_index = self.hint
+        while word_index < len(words) and not words[word_index]:
+            word_index += 1
+        self.hint = word_index
+        if word_index == len(words):
+            return -1
+        word = words[word_index]
+        words[word_index] = word & (word - 1)  # Clear the lowest set bit
+        self.count -= 1
+        return (word_index << 6) | ((word & -word).bit_length() - 1)
+
+
+class CompactParkingLot:
+    """
+    Array-backed alternative to ParkingLot for very large fleets. A spot is just an index:
+    its size lives in a byte array and its occupant's vehicle id in an int64 array (-1 when
+    free), with one FreeBitset per size. 1M spots take about 9 MB instead of one Python
+    object per spot.
+    """
+    FREE = -1
+
+    def __init__(self, small_count, medium_count, large_count):
+        self.sizes = array('B')
+        self.occupants = array('q')
+        self.free = [FreeBitset() for _ in Size]
+        self.spot_of_vehicle = {}  # vehicle id -> spot index, only for parked vehicles
+        self.vehicleid = 0
+        for size, count in ((Size.SMALL, small_count), (Size.MEDIUM, medium_count), (Size.LARGE, large_count)):
+            self.create_spots(size, count)
+
+    def create_spots(self, size, count):
+        size = Size.get(size)
+        start = len(self.sizes)
+        self.sizes.extend(bytes([size.value]) * count)
+        self.occupants.extend(array('q', [self.FREE]) * count)
+        for bitset in self.free:
+            bitset.grow(len(self.sizes))
+        self.free[size.value].add_range(start, start + count)
+        return range(start, start + count)
+
+    def create_vehicle(self, numberplate, size):
+        v = Vehicle(self.vehicleid, numberplate, size)
+        self.vehicleid += 1
+        return v
 
     def park_vehicle(self, vehicle):
-        spot = self.find_spot(vehicle)
-        if spot:
-            vehicle.parked_spot = spot
-            spot.vehicle = vehicle
+        if vehicle.id in self.spot_of_vehicle:
+            raise VehicleAlreadyParked()
+        for size_value in range(vehicle.size.value, len(Size)):
+            spot = self.free[size_value].pop_first()
+            if spot != -1:
+                self.occupants[spot] = vehicle.id
+                self.spot_of_vehicle[vehicle.id] = spot
+                return spot
+        raise NoSpotAvailable(vehicle.size)
 
     def remove_vehicle(self, vehicle):
-        if vehicle.parked_spot and vehicle.parked_spot.vehicle == vehicle:
-            spot = vehicle.parked_spot
-            spot.vehicle = None
-            vehicle.parked_spot = None
-            self.available_parking_spots[spot.size.value].append(spot)
-            del self.vehicles[vehicle.id]
-        else:
-            raise Exception('Vehicle is not in a parking spot')
+        spot = self.spot_of_vehicle.pop(vehicle.id, None)
+        if spot is None:
+            raise VehicleNotParked()
+        self.occupants[spot] = self.FREE
+        self.free[self.sizes[spot]].add(spot)
+        return spot
+
+    def free_spots(self, size):
+        return self.free[Size.get(size).value].count
+
+    def memory_bytes(self):
+        return (self.sizes.buffer_info()[1] * self.sizes.itemsize
+                + self.occupants.buffer_info()[1] * self.occupants.itemsize
+                + sum(len(bitset.words) * 8 for bitset in self.free))
+
+
+class AsyncParkingGate:
+    # asyncio front end for a gate. Allocation only holds a per-size lock for a few
+    # microseconds, so calls run inline on the event loop instead of in an executor.
+    def __init__(self, parking_lot, name):
+        self.parking_lot = parking_lot
+        self.name = name
+
+    async def park(self, vehicle, floor=None):
+        return self.parking_lot.park_vehicle(vehicle, floor)
+
+    async def leave(self, vehicle):
+        return self.parking_lot.remove_vehicle(vehicle)
+
+    async def reserve(self, size, hold_seconds=300, floor=None):
+        return self.parking_lot.reserve(size, hold_seconds, floor)
+
+    async def confirm(self, hold, vehicle):
+        return self.parking_lot.confirm(hold, vehicle)
+
+
+def latency_report(label, latencies, elapsed):
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0
+    print(f'{label}: {len(latencies)} park/leave cycles in {elapsed:.2f}s, '
+          f'{len(latencies) / elapsed:,.0f} ops/s, p99 {p99 * 1e6:.0f} us')
+    return len(latencies) / elapsed, p99
+
+
+def check_no_double_allocation(parking_lot):
+    occupied = [spot for spot in parking_lot.parkingspots if not spot.is_available()]
+    assert len({id(spot.vehicle) for spot in occupied}) == len(occupied), 'vehicle in two spots'
+    free = sum(parking_lot.allocator.free_counts)
+    assert free + len(occupied) == len(parking_lot.parkingspots), 'spot lost or handed out twice'
+
+
+def run_gate_load_test(gates=2000, cycles_per_gate=10, threads=32):
+    """
+    Simulates many entry/exit gates parking and removing vehicles at once, first as asyncio
+    gate tasks and then as OS threads, and reports throughput and p99 latency per cycle.
+    Spots equal the number of concurrent vehicles so the lot never reports full.
+    """
+    sizes = list(Size)
+
+    async def gate_task(gate, latencies, rng):
+        for i in range(cycles_per_gate):
+            vehicle = gate.parking_lot.create_vehicle(f'{gate.name}-{i}', rng.choice(sizes))
+            start = time.perf_counter()
+            await gate.park(vehicle)
+            await asyncio.sleep(0)  # Let other gates interleave while the car is parked
+            await gate.leave(vehicle)
+            latencies.append(time.perf_counter() - start)
+
+    async def run_async():
+        lot = ParkingLot(0, 0, gates)
+        latencies = []
+        rng = random.Random(0)
+        start = time.perf_counter()
+        await asyncio.gather(*(gate_task(AsyncParkingGate(lot, f'G{g}'), latencies, rng) for g in range(gates)))
+        check_no_double_allocation(lot)
+        return latency_report(f'asyncio, {gates} gates', latencies, time.perf_counter() - start)
+
+    asyncio_result = asyncio.run(run_async())
+
+    lot = ParkingLot(threads, threads, threads)
+    latencies = []
+
+    def thread_gate(seed):
+        rng = random.Random(seed)
+        local = []
+        for i in range(cycles_per_gate * gates // threads):
+            vehicle = lot.create_vehicle(f'T{seed}-{i}', rng.choice(sizes))
+            start = time.perf_counter()
+            lot.park_vehicle(vehicle)
+            lot.remove_vehicle(vehicle)
+            local.append(time.perf_counter() - start)
+        latencies.extend(local)
+
+    workers = [threading.Thread(target=thread_gate, args=(seed,)) for seed in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    check_no_double_allocation(lot)
+    thread_result = latency_report(f'threads, {threads} gates', latencies, time.perf_counter() - start)
+    return asyncio_result, thread_result
 
 def main():
     # Initialize the parking lot with 2 of each spot size
@@ -143,7 +975,10 @@ def main():
 
     # Attempt to park another vehicle when the lot is full
     vehicle5 = parking_lot.create_vehicle('JKL345', 'large')
-    parking_lot.park_vehicle(vehicle5)
+    try:
+        parking_lot.park_vehicle(vehicle5)
+    except NoSpotAvailable as e:
+        print(f"Error: {e}")
     
 
     # Remove a vehicle and try to park another one
@@ -157,6 +992,95 @@ def main():
         status = 'available' if spot.is_available() else f'occupied by {spot.vehicle.numberplate}'
         print(f'Spot ID {spot.id}, Size {spot.size.name}, Status: {status}')
 
+    # A multi-level garage: spots nearer the entrance are handed out first
+    garage = ParkingLot(0, 0, 0, policy=AllocationPolicy.NEAREST_FIRST)
+    for floor in range(3):
+        for slot in range(4):
+            garage.create_spot(Size.SMALL if slot < 2 else Size.LARGE, floor=floor, distance=floor * 100 + slot * 10)
+    truck = garage.create_vehicle('TRK001', 'large')
+    car = garage.create_vehicle('CAR001', 'small')
+    upstairs = garage.create_vehicle('CAR002', 'small')
+    garage.park_vehicle(truck)
+    garage.park_vehicle(car)
+    garage.park_vehicle(upstairs, floor=2)
+    for v in (truck, car, upstairs):
+        print(f'{v.numberplate} -> spot {v.parked_spot.id} on floor {v.parked_spot.floor}, distance {v.parked_spot.distance}')
+
+    # Reservations hold a spot for a limited time
+    hold = garage.reserve('small', hold_seconds=0.01)
+    print(f'Held spot {hold.spot.id}; free small spots now {garage.allocator.free_count("small")}')
+    time.sleep(0.02)
+    print(f'Confirm after expiry: {garage.confirm(hold, garage.create_vehicle("LATE01", "small"))}; '
+          f'expired {garage.expire_holds()}, free small spots {garage.allocator.free_count("small")}')
+
+    # Occupancy journal, live display board and crash recovery
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path, snapshot_path = os.path.join(tmp, 'occupancy.jsonl'), os.path.join(tmp, 'snapshot.json')
+        lot = ParkingLot(2, 2, 1, log_path=log_path)
+        board = lot.log.stream()
+        first = lot.create_vehicle('BRD001', 'small')
+        lot.park_vehicle(first)
+        lot.log.save_snapshot(snapshot_path)
+        second = lot.create_vehicle('BRD002', 'large')
+        lot.park_vehicle(second)
+        lot.remove_vehicle(first)
+        while not board.empty():
+            event = board.get()
+            print(f'Board: #{event.seq} {event.kind} spot {event.spot_id} ({event.size.name}, floor {event.floor})')
+        print('Free by size:', {size.name: lot.free_spots(size) for size in Size})
+        lot.log.close()
+        recovered = ParkingLot.recover(log_path, snapshot_path)
+        print('Recovered free by size:', {size.name: recovered.free_spots(size) for size in Size},
+              'parked:', [v.numberplate for v in recovered.vehicles.values()])
+        recovered.log.close()
+
+    # Tickets and pricing
+    rates = RateTable({'small': 2.0, 'medium': 3.0, 'large': 5.0}, daily_caps={'small': 20, 'medium': 30, 'large': 45},
+                      tiers=[(8, 18, 1.5)])
+    now = [8 * 3600.0]  # 08:00 on day 0 of a simulated clock
+    paid = ParkingLot(1, 1, 1, rates=rates, clock=lambda: now[0])
+    commuter = paid.create_vehicle('PAY001', 'small')
+    paid.park_vehicle(commuter)
+    now[0] += 2.5 * 3600
+    paid.remove_vehicle(commuter)
+    ticket = paid.closed_tickets[-1]
+    print(f'Ticket {ticket.id}: {ticket.numberplate} paid {ticket.fee} for 2.5 peak hours')
+
+    rng = random.Random(1)
+    count = 100000
+    sizes = [rng.randrange(3) for _ in range(count)]
+    entries = [rng.uniform(0, 86400) for _ in range(count)]
+    exits = [entry + rng.uniform(0, 3 * 86400) for entry in entries]
+    start = time.perf_counter()
+    fees = rates.bulk_fees(sizes, entries, exits)
+    print(f'Bulk billed {count} tickets in {time.perf_counter() - start:.3f}s, total {float(sum(fees)):,.2f}')
+
+    # Array-backed lot with a million spots
+    start = time.perf_counter()
+    big = CompactParkingLot(400000, 400000, 200000)
+    cars = [big.create_vehicle(f'BIG{i}', 'medium') for i in range(100000)]
+    for car in cars:
+        big.park_vehicle(car)
+    for car in cars[::2]:
+        big.remove_vehicle(car)
+    print(f'Compact lot: 1M spots in {big.memory_bytes() / 2**20:.1f} MB, 150k park/leave in '
+          f'{time.perf_counter() - start:.2f}s, free medium {big.free_spots("medium")}')
+
+    # Metrics instead of printing on every allocation
+    metrics = InMemoryMetrics()
+    observed = ParkingLot(50, 0, 0, metrics=metrics)
+    for i in range(60):
+        try:
+            observed.park_vehicle(observed.create_vehicle(f'OBS{i}', 'small'))
+        except NoSpotAvailable:
+            pass
+    print(f'Metrics: {dict(metrics.counters)}, failures {dict(metrics.failures)}, '
+          f'p99 allocate <= {metrics.percentile("allocate", 0.99) * 1e6:.0f} us')
+
+    # Many gates at once
+    run_gate_load_test(gates=500, cycles_per_gate=4, threads=8)
+
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -10,45 +10,117 @@ Classes:
    - Methods: addComment(user, comment), getComments()
 
 3. Votable (ABC): Abstract base class for items that can receive votes.
-   - Methods: addVote(user, vote), getVotes()
+   - Methods: addVote(user, vote) -> previous vote, removeVote(user), getVotes(), getScore()
 
 4. Question: Represents questions posted by users.   - Inherits: Commentable, Votable
-   - Attributes: id, title, content, tags, author, creationDate, answers, comments, votes
-   - Methods: addComment, getComments, addVote, getVotes
+   - Attributes: id, title, content, tags, author, creationDate, creationTime, lastActivity, answers, comments, votes (per-user map), upvotes, downvotes, acceptedAnswer
+   - Methods: addComment, getComments, addVote, removeVote, getVotes, getScore
 
 5. Answer: Represents answers to questions.   - Inherits: Commentable, Votable
-   - Attributes: id, question, content, author, creationDate, comments, votes, isAccepted
-   - Methods: addComment, getComments, addVote, getVotes
+   - Attributes: id, question, content, author, creationDate, comments, votes (per-user map), upvotes, downvotes, isAccepted
+   - Methods: addComment, getComments, addVote, removeVote, getVotes, getScore
 
 6. Comment: Represents comments on questions or answers.
    - Attributes: id, comment, author, creationDate, commentable
 
 7. Vote: Represents votes on questions or answers.
-   - Attributes: id, vote, author, creationDate, votable
+   - Attributes: id, vote, author, creationDate, votable, previous (the voter's earlier vote on the post, 0 if none)
 
-8. Tag: Represents tags associated with questions.
+8. Tag: Represents tags associated with questions (registered per StackOverFlow instance).
    - Attributes: id, title, questions
    - Methods: addQuestion()
 
-9. StackOverFlow: Manages the overall operations of the platform.
-   - Attributes: users, questions, answers, comments, votes, tags
-   - Methods: addUser, addQuestion, getOrCreateTag, addAnswer, addCommentToQuestion, addCommentToAnswer, addVoteToQuestion, addVoteToAnswer, findUser, findQuestion, findAnswer
+9. ReputationEngine: Updates author reputation incrementally on votes and accepted answers.
+   - Methods: votePoints(votable, vote), onVote(votable, previous, vote), onAccept(answer, accepted), recompute(users, questions, answers)
+
+10. RankedList / QuestionFeeds: Maintained sorted rankings ("newest", "active", "votes", "hot") globally and per tag.
+   - Methods: addQuestion(question), build(questions), onVote(question), onActivity(question), page(kind, tag_title, cursor, limit) -> (questions, next_cursor)
+
+11. SearchIndex: Incremental inverted index over question/answer text with BM25 ranking.
+   - Attributes: postings (term -> {question id: term frequency}), doc_lengths, total_length, questions
+   - Methods: tokenize(text), addQuestion(question), addAnswer(answer), search(query, tags, k)
+
+12. IdAllocator: Per-platform id source; threads reserve blocks of ids and allocate from them without locking.
+   - Methods: next(kind), observe(kind, id)
+
+13. StackOverFlow: Manages the overall operations of the platform.
+   - Attributes: users, users_by_name, questions, answers, comments, votes, tags (all dicts keyed by id / username / tag title), search_index, reputation, feeds, ids
+   - Methods: addUser, addQuestion, getOrCreateTag, addAnswer, addCommentToQuestion, addCommentToAnswer, addVoteToQuestion, addVoteToAnswer, removeVote, acceptAnswer, recomputeReputation, getQuestionFeed, bulkLoad(records), rebuildIndexes, exportRecords, findUser, findQuestion, findAnswer, getUserQuestions, getUserAnswers, searchQuestions
 
 Usage:
 - Initialize the system.
 - Add and manage users, questions, answers, comments, and votes.
 - Link questions with tags and manage tag associations.
+- List "hot", "newest", "active" and "votes" feeds, globally or per tag, page by page with getQuestionFeed.
+- Search questions by free text (optionally restricted to tags) with searchQuestions.
+- Ids come from a per-platform IdAllocator; mutations lock only the question they touch (see runStressBenchmark).
+- Stream snapshots in and out with bulkLoad / exportRecords and the readJsonl / writeJsonl / readCsv / writeCsv helpers.
 """
 
 
+import bisect
+import csv
 import datetime
+import heapq
+import itertools
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
 from abc import ABC, abstractmethod
 
+def nextId(cls, id=None):
+    # Ids handed out by a platform's IdAllocator are used as-is; the class counter is
+    # only a fallback for objects built outside a StackOverFlow instance.
+    if id is not None:
+        return id
+    id = cls.ID
+    cls.ID += 1
+    return id
+
+class IdAllocator:
+    # Each thread reserves a block of ids under the lock and then hands them out from
+    # its own block without locking. Ids stay unique but are not dense across threads.
+    # Importing an id that may sit inside reserved blocks bumps the kind's generation,
+    # which retires every thread's block on its next allocation.
+    BLOCK_SIZE = 1024
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._next = {}  # kind -> first id not yet reserved
+        self._generation = {}  # kind -> generation that blocks must carry to stay valid
+        self._local = threading.local()
+
+    def next(self, kind):
+        blocks = getattr(self._local, "blocks", None)
+        if blocks is None:
+            blocks = self._local.blocks = {}
+        block = blocks.get(kind)
+        if block is None or block[0] >= block[1] or block[2] != self._generation.get(kind, 0):
+            with self._lock:
+                start = self._next.get(kind, 0)
+                self._next[kind] = start + self.BLOCK_SIZE
+                generation = self._generation.get(kind, 0)
+            block = blocks[kind] = [start, start + self.BLOCK_SIZE, generation]
+        id = block[0]
+        block[0] += 1
+        return id
+
+    def observe(self, kind, id):
+        # Called for imported ids so later allocations start past them
+        with self._lock:
+            reserved = self._next.get(kind, 0)
+            if id < reserved:
+                self._generation[kind] = self._generation.get(kind, 0) + 1
+            self._next[kind] = max(reserved, id + 1)
+
 class User:
     ID = 0
-    def __init__(self, username, email) -> None:
-        self.id = type(self).ID
-        type(self).ID += 1
+    def __init__(self, username, email, id=None) -> None:
+        self.id = nextId(type(self), id)
         self.username = username
         self.email = email
         self.reputation = 0
@@ -70,23 +142,36 @@ class Votable(ABC):
     def addVote(self, user, vote):
         pass
 
+    @abstractmethod
+    def removeVote(self, user):
+        pass
+
     @abstractmethod
     def getVotes(self):
         pass
 
+    @abstractmethod
+    def getScore(self):
+        pass
+
 class Question(Commentable, Votable):
     ID = 0
-    def __init__(self, user, title, content, tags) -> None:
-        self.id = type(self).ID
-        type(self).ID += 1
+    def __init__(self, user, title, content, tags, id=None, creationDate=None, creationTime=None) -> None:
+        self.id = nextId(type(self), id)
         self.title = title
         self.content = content
         self.tags = tags
         self.author = user
-        self.creationDate = datetime.date.today()
+        self.creationDate = creationDate or datetime.date.today()
+        self.creationTime = creationTime or time.time()
+        self.lastActivity = self.creationTime
         self.answers = []
         self.comments = []
-        self.votes = []
+        self.votes = {}  # user id -> (user, vote), one vote per user
+        self.upvotes = 0
+        self.downvotes = 0
+        self.acceptedAnswer = None
+        self.lock = threading.Lock()  # Guards this question and its answers, comments and votes
 
     def addComment(self, user, comment):
         self.comments.append((user, comment))
@@ -95,22 +180,42 @@ class Question(Commentable, Votable):
         return self.comments
 
     def addVote(self, user, vote):
-        self.votes.append((user, vote))
+        previous = self.removeVote(user)
+        self.votes[user.id] = (user, vote)
+        if vote > 0:
+            self.upvotes += 1
+        else:
+            self.downvotes += 1
+        return previous
+
+    def removeVote(self, user):
+        entry = self.votes.pop(user.id, None)
+        if entry is None:
+            return 0
+        if entry[1] > 0:
+            self.upvotes -= 1
+        else:
+            self.downvotes -= 1
+        return entry[1]
 
     def getVotes(self):
-        return self.votes
+        return list(self.votes.values())
+
+    def getScore(self):
+        return self.upvotes - self.downvotes
 
 class Answer(Commentable, Votable):
     ID = 0
-    def __init__(self, user, question, content) -> None:
-        self.id = type(self).ID
-        type(self).ID += 1
+    def __init__(self, user, question, content, id=None, creationDate=None) -> None:
+        self.id = nextId(type(self), id)
         self.question = question
         self.content = content
         self.author = user
-        self.creationDate = datetime.date.today()
+        self.creationDate = creationDate or datetime.date.today()
         self.comments = []
-        self.votes = []
+        self.votes = {}  # user id -> (user, vote), one vote per user
+        self.upvotes = 0
+        self.downvotes = 0
         self.isAccepted = False
 
     def addComment(self, user, comment):
@@ -120,118 +225,685 @@ class Answer(Commentable, Votable):
         return self.comments
 
     def addVote(self, user, vote):
-        self.votes.append((user, vote))
+        previous = self.removeVote(user)
+        self.votes[user.id] = (user, vote)
+        if vote > 0:
+            self.upvotes += 1
+        else:
+            self.downvotes += 1
+        return previous
+
+    def removeVote(self, user):
+        entry = self.votes.pop(user.id, None)
+        if entry is None:
+            return 0
+        if entry[1] > 0:
+            self.upvotes -= 1
+        else:
+            self.downvotes -= 1
+        return entry[1]
 
     def getVotes(self):
-        return self.votes
+        return list(self.votes.values())
+
+    def getScore(self):
+        return self.upvotes - self.downvotes
 
 class Comment:
     ID = 0
-    def __init__(self, user, commentable: Commentable, comment) -> None:
-        self.id = type(self).ID
-        type(self).ID += 1
+    def __init__(self, user, commentable: Commentable, comment, id=None, creationDate=None) -> None:
+        self.id = nextId(type(self), id)
         self.comment = comment
         self.author = user
-        self.creationDate = datetime.date.today()
+        self.creationDate = creationDate or datetime.date.today()
+        self.commentable = commentable
         commentable.addComment(user, comment)
 
 class Vote:
     ID = 0
-    def __init__(self, user, votable: Votable, vote) -> None:
-        self.id = type(self).ID
-        type(self).ID += 1
+    def __init__(self, user, votable: Votable, vote, id=None, creationDate=None) -> None:
+        self.id = nextId(type(self), id)
         self.vote = vote
         self.author = user
-        self.creationDate = datetime.date.today()
-        votable.addVote(user, vote)
+        self.creationDate = creationDate or datetime.date.today()
+        self.votable = votable
+        self.previous = votable.addVote(user, vote)
 
 class Tag:
     ID = 0
-    tags = {}  # Using a dictionary to manage tags and associated questions
 
-    def __init__(self, title) -> None:
-        if title in Tag.tags:
-            raise ValueError("Tag already exists.")
-        self.id = type(self).ID
-        type(self).ID += 1
+    def __init__(self, title, id=None) -> None:
+        self.id = nextId(type(self), id)
         self.title = title
         self.questions = []
-        Tag.tags[title] = self
 
     def addQuestion(self, question):
         self.questions.append(question)
 
+class ReputationEngine:
+    QUESTION_UPVOTE = 10
+    ANSWER_UPVOTE = 10
+    DOWNVOTE = -2
+    ACCEPTED_ANSWER = 15
+    ACCEPTER = 2
+
+    def __init__(self) -> None:
+        # Votes on different questions can credit the same author, so updates share one lock
+        self._lock = threading.Lock()
+
+    def votePoints(self, votable, vote):
+        if vote > 0:
+            return self.ANSWER_UPVOTE if isinstance(votable, Answer) else self.QUESTION_UPVOTE
+        if vote < 0:
+            return self.DOWNVOTE
+        return 0
+
+    def onVote(self, votable, previous, vote):
+        delta = self.votePoints(votable, vote) - self.votePoints(votable, previous)
+        with self._lock:
+            votable.author.reputation += delta
+        return delta
+
+    def onAccept(self, answer, accepted=True):
+        sign = 1 if accepted else -1
+        with self._lock:
+            answer.author.reputation += sign * self.ACCEPTED_ANSWER
+            if answer.question.author is not answer.author:
+                answer.question.author.reputation += sign * self.ACCEPTER
+
+    def recompute(self, users, questions, answers):
+        # Batch path for backfills: rebuilds every reputation from the per-post counters
+        for user in users:
+            user.reputation = 0
+        for post in list(questions) + list(answers):
+            post.author.reputation += (self.votePoints(post, 1) * post.upvotes
+                                       + self.votePoints(post, -1) * post.downvotes)
+        for answer in answers:
+            if answer.isAccepted:
+                self.onAccept(answer)
+
+class SearchIndex:
+    # A question and all of its answers are indexed as a single document, so an
+    # answer matching the query ranks the question it belongs to.
+    TOKEN_RE = re.compile(r"[a-z0-9]+(?:[+#][a-z0-9+#]*)?")
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self) -> None:
+        self.postings = {}  # term -> {question id: term frequency}
+        self.doc_lengths = {}  # question id -> number of indexed tokens
+        self.total_length = 0
+        self.questions = {}  # question id -> Question
+        self._lock = threading.Lock()
+
+    @classmethod
+    def tokenize(cls, text):
+        return cls.TOKEN_RE.findall(text.lower())
+
+    def _index(self, question_id, text):
+        tokens = self.tokenize(text)
+        with self._lock:
+            for token in tokens:
+                docs = self.postings.setdefault(token, {})
+                docs[question_id] = docs.get(question_id, 0) + 1
+            self.doc_lengths[question_id] = self.doc_lengths.get(question_id, 0) + len(tokens)
+            self.total_length += len(tokens)
+
+    def addQuestion(self, question):
+        self.questions[question.id] = question
+        self._index(question.id, f"{question.title} {question.content}")
+
+    def addAnswer(self, answer):
+        self._index(answer.question.id, answer.content)
+
+    def search(self, query, tags=None, k=10):
+        terms = set(self.tokenize(query))
+        with self._lock:
+            return self._search(terms, tags, k)
+
+    def _search(self, terms, tags, k):
+        if not terms or not self.doc_lengths:
+            return []
+
+        n_docs = len(self.doc_lengths)
+        avg_length = self.total_length / n_docs
+        scores = {}
+        for term in terms:
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for question_id, tf in docs.items():
+                norm = self.K1 * (1 - self.B + self.B * self.doc_lengths[question_id] / avg_length)
+                scores[question_id] = scores.get(question_id, 0.0) + idf * tf * (self.K1 + 1) / (tf + norm)
+
+        matches = scores.items()
+        if tags:
+            # Only documents that scored are checked, so the cost does not grow with the tags' size
+            allowed = set(tags)
+            matches = (item for item in matches if not allowed.isdisjoint(self.questions[item[0]].tags))
+        top = heapq.nlargest(k, matches, key=lambda item: item[1])
+        return [(self.questions[question_id], score) for question_id, score in top]
+
+class RankedList:
+    # Keys are kept sorted ascending (best first) and end with the question id, so
+    # they are unique and double as pagination cursors. They are stored in blocks of at
+    # most 2 * BLOCK_SIZE keys with each block's last key in `maxes`, so an update costs
+    # O(log n + block) instead of shifting one flat list; the "newest", "active" and
+    # "hot" keys always land at the front, where a flat list is at its worst.
+    BLOCK_SIZE = 1000
+
+    def __init__(self, keys=()) -> None:
+        # `keys` must already be sorted (the bulk path in QuestionFeeds.build)
+        keys = list(keys)
+        self.blocks = [keys[i:i + self.BLOCK_SIZE] for i in range(0, len(keys), self.BLOCK_SIZE)]
+        self.maxes = [block[-1] for block in self.blocks]
+
+    def __len__(self):
+        return sum(len(block) for block in self.blocks)
+
+    def insert(self, key):
+        if not self.blocks:
+            self.blocks.append([key])
+            self.maxes.append(key)
+            return
+        i = min(bisect.bisect_left(self.maxes, key), len(self.blocks) - 1)
+        block = self.blocks[i]
+        bisect.insort(block, key)
+        self.maxes[i] = block[-1]
+        if len(block) > 2 * self.BLOCK_SIZE:
+            self.blocks[i:i + 1] = [block[:self.BLOCK_SIZE], block[self.BLOCK_SIZE:]]
+            self.maxes[i:i + 1] = [self.blocks[i][-1], self.blocks[i + 1][-1]]
+
+    def remove(self, key):
+        i = bisect.bisect_left(self.maxes, key)
+        if i == len(self.blocks):
+            return
+        block = self.blocks[i]
+        j = bisect.bisect_left(block, key)
+        if j < len(block) and block[j] == key:
+            del block[j]
+            if block:
+                self.maxes[i] = block[-1]
+            else:
+                del self.blocks[i]
+                del self.maxes[i]
+
+    def page(self, cursor=None, limit=20):
+        i = start = 0
+        if cursor is not None:
+            i = bisect.bisect_right(self.maxes, cursor)
+            if i < len(self.blocks):
+                start = bisect.bisect_right(self.blocks[i], cursor)
+        keys = []
+        while i < len(self.blocks) and len(keys) < limit:
+            keys.extend(self.blocks[i][start:start + limit - len(keys)])
+            i, start = i + 1, 0
+        return keys
+
+class QuestionFeeds:
+    KINDS = ("newest", "active", "votes", "hot")
+    HOT_DECAY_SECONDS = 45000  # One order of magnitude of score is worth ~12.5 hours of recency
+
+    def __init__(self) -> None:
+        self.lists = {}  # (kind, tag title or None for global) -> RankedList
+        self.keys = {}  # (kind, question id) -> current key
+        self.questions = {}  # question id -> Question
+        self._lock = threading.Lock()
+
+    @classmethod
+    def hotness(cls, question):
+        # Time is added rather than decayed, so a question's hotness only changes
+        # when it is voted on or active and never has to be re-ranked as time passes.
+        score = question.getScore()
+        order = math.log10(max(abs(score), 1))
+        sign = 1 if score > 0 else -1 if score < 0 else 0
+        return sign * order + question.lastActivity / cls.HOT_DECAY_SECONDS
+
+    def key(self, kind, question):
+        if kind == "newest":
+            return (-question.creationTime, -question.id)
+        if kind == "active":
+            return (-question.lastActivity, -question.id)
+        if kind == "votes":
+            return (-question.getScore(), -question.id)
+        return (-self.hotness(question), -question.id)
+
+    def _scopes(self, question):
+        return [None] + [tag.title for tag in question.tags]
+
+    def _ranked(self, kind, scope):
+        ranked = self.lists.get((kind, scope))
+        if ranked is None:
+            ranked = self.lists[(kind, scope)] = RankedList()
+        return ranked
+
+    def _place(self, kind, question):
+        old = self.keys.get((kind, question.id))
+        new = self.key(kind, question)
+        if old == new:
+            return
+        for scope in self._scopes(question):
+            ranked = self._ranked(kind, scope)
+            if old is not None:
+                ranked.remove(old)
+            ranked.insert(new)
+        self.keys[(kind, question.id)] = new
+
+    def addQuestion(self, question):
+        with self._lock:
+            self.questions[question.id] = question
+            for kind in self.KINDS:
+                self._place(kind, question)
+
+    def build(self, questions):
+        # Bulk path: collect every key and sort each list once instead of inserting one by one
+        collected = {}
+        self.keys = {}
+        for question in questions:
+            self.questions[question.id] = question
+            for kind in self.KINDS:
+                key = self.key(kind, question)
+                self.keys[(kind, question.id)] = key
+                for scope in self._scopes(question):
+                    collected.setdefault((kind, scope), []).append(key)
+        self.lists = {list_key: RankedList(sorted(keys)) for list_key, keys in collected.items()}
+
+    def onVote(self, question):
+        with self._lock:
+            self._place("votes", question)
+            self._place("hot", question)
+
+    def onActivity(self, question):
+        with self._lock:
+            self._place("active", question)
+            self._place("hot", question)
+
+    def page(self, kind="hot", tag_title=None, cursor=None, limit=20):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown feed: {kind}")
+        with self._lock:
+            ranked = self.lists.get((kind, tag_title))
+            if ranked is None:
+                return [], None
+            keys = ranked.page(cursor, limit)
+        next_cursor = keys[-1] if len(keys) == limit else None
+        return [self.questions[-key[-1]] for key in keys], next_cursor
+
 class StackOverFlow:
     def __init__(self):
-        self.users = []
-        self.questions = []
-        self.answers = []
-        self.comments = []
-        self.votes = []
-        self.tags = []
+        # Every registry is owned by the instance so several platforms can live in one process
+        self.users = {}  # user id -> User
+        self.users_by_name = {}  # username -> User
+        self.questions = {}  # question id -> Question
+        self.answers = {}  # answer id -> Answer
+        self.comments = {}  # comment id -> Comment
+        self.votes = {}  # vote id -> Vote
+        self.tags = {}  # tag title -> Tag
+        self.search_index = SearchIndex()
+        self.reputation = ReputationEngine()
+        self.feeds = QuestionFeeds()
+        self.ids = IdAllocator()
+        # Registry lock guards check-then-insert on usernames and tags. Everything that
+        # mutates one question thread (its answers, comments and votes) takes that
+        # question's own lock, so writers on different questions never contend.
+        self._registry_lock = threading.Lock()
 
     def addUser(self, username, email):
-        user = User(username, email)
-        self.users.append(user)
+        with self._registry_lock:
+            if username in self.users_by_name:
+                raise ValueError("Username already exists.")
+            user = User(username, email, id=self.ids.next("user"))
+            self.users[user.id] = user
+            self.users_by_name[username] = user
         return user
 
     def addQuestion(self, user, title, content, tag_titles):
         tags = [self.getOrCreateTag(title) for title in tag_titles]
-        question = Question(user, title, content, tags)
-        self.questions.append(question)
-        for tag in tags:
-            tag.addQuestion(question)
+        question = Question(user, title, content, tags, id=self.ids.next("question"))
+        self._registerQuestion(question)
+        self.search_index.addQuestion(question)
+        self.feeds.addQuestion(question)
         return question
 
+    def _registerQuestion(self, question):
+        self.questions[question.id] = question
+        question.author.questions.append(question)
+        for tag in question.tags:
+            tag.addQuestion(question)
+
     def getOrCreateTag(self, title):
-        if title in Tag.tags:
-            return Tag.tags[title]
-        else:
-            return Tag(title)
+        tag = self.tags.get(title)
+        if tag is None:
+            with self._registry_lock:
+                tag = self.tags.get(title)
+                if tag is None:
+                    tag = Tag(title, id=self.ids.next("tag"))
+                    self.tags[title] = tag
+        return tag
 
     def addAnswer(self, user, question, content):
-        answer = Answer(user, question, content)
-        self.answers.append(answer)
-        question.answers.append(answer)
+        answer = Answer(user, question, content, id=self.ids.next("answer"))
+        with question.lock:
+            self._registerAnswer(answer)
+            self.search_index.addAnswer(answer)
+            self._touch(question)
         return answer
 
+    def _registerAnswer(self, answer):
+        self.answers[answer.id] = answer
+        answer.author.answers.append(answer)
+        answer.question.answers.append(answer)
+
     def addCommentToQuestion(self, user, question, comment):
-        comment_obj = Comment(user, question, comment)
-        self.comments.append(comment_obj)
+        with question.lock:
+            comment_obj = Comment(user, question, comment, id=self.ids.next("comment"))
+            self.comments[comment_obj.id] = comment_obj
+            user.comments.append(comment_obj)
+            self._touch(question)
         return comment_obj
 
     def addCommentToAnswer(self, user, answer, comment):
-        comment_obj = Comment(user, answer, comment)
-        self.comments.append(comment_obj)
+        with answer.question.lock:
+            comment_obj = Comment(user, answer, comment, id=self.ids.next("comment"))
+            self.comments[comment_obj.id] = comment_obj
+            user.comments.append(comment_obj)
+            self._touch(answer.question)
         return comment_obj
 
     def addVoteToQuestion(self, user, question, vote):
-        vote_obj = Vote(user, question, vote)
-        self.votes.append(vote_obj)
-        return vote_obj
+        return self._vote(user, question, vote)
 
     def addVoteToAnswer(self, user, answer, vote):
-        vote_obj = Vote(user, answer, vote)
-        self.votes.append(vote_obj)
+        return self._vote(user, answer, vote)
+
+    def _vote(self, user, votable, vote):
+        if vote not in (1, -1):
+            raise ValueError("Vote must be 1 or -1.")
+        if votable.author is user:
+            raise ValueError("Users cannot vote on their own posts.")
+        with _questionOf(votable).lock:
+            vote_obj = Vote(user, votable, vote, id=self.ids.next("vote"))
+            self.votes[vote_obj.id] = vote_obj
+            self.reputation.onVote(votable, vote_obj.previous, vote)
+            if isinstance(votable, Question):
+                self.feeds.onVote(votable)
         return vote_obj
 
+    def removeVote(self, user, votable):
+        with _questionOf(votable).lock:
+            previous = votable.removeVote(user)
+            self.reputation.onVote(votable, previous, 0)
+            if isinstance(votable, Question):
+                self.feeds.onVote(votable)
+        return previous
+
+    def _touch(self, question):
+        question.lastActivity = time.time()
+        self.feeds.onActivity(question)
+
+    def getQuestionFeed(self, kind="hot", tag_title=None, cursor=None, limit=20):
+        return self.feeds.page(kind, tag_title, cursor, limit)
+
+    def bulkLoad(self, records):
+        # Records must arrive in dependency order (users, questions, answers, comments, votes).
+        # Only the registries are filled while streaming; the search index, feeds and
+        # reputation are built once at the end. Records without an id get one from the allocator.
+        registries = {"user": self.users, "question": self.questions, "answer": self.answers,
+                      "comment": self.comments, "vote": self.votes}
+        count = 0
+        for record in records:
+            kind = record["type"]
+            if kind not in registries:
+                raise ValueError(f"Unknown record type: {kind}")
+            id = record.get("id")
+            if id is None:
+                id = self.ids.next(kind)
+            elif id in registries[kind]:
+                raise ValueError(f"Duplicate {kind} id {id}")
+            else:
+                self.ids.observe(kind, id)
+            if kind == "user":
+                with self._registry_lock:
+                    if record["username"] in self.users_by_name:
+                        raise ValueError(f"Username already exists: {record['username']}")
+                    user = User(record["username"], record["email"], id=id)
+                    self.users[user.id] = user
+                    self.users_by_name[user.username] = user
+            elif kind == "question":
+                tags = [self.getOrCreateTag(title) for title in record["tags"]]
+                question = Question(self.users[record["author_id"]], record["title"], record["content"], tags,
+                                    id=id, creationDate=_parseDate(record.get("creationDate")),
+                                    creationTime=record.get("creationTime"))
+                question.lastActivity = record.get("lastActivity") or question.creationTime
+                self._registerQuestion(question)
+            elif kind == "answer":
+                answer = Answer(self.users[record["author_id"]], self.questions[record["question_id"]],
+                                record["content"], id=id,
+                                creationDate=_parseDate(record.get("creationDate")))
+                self._registerAnswer(answer)
+                if record.get("accepted"):
+                    answer.isAccepted = True
+                    answer.question.acceptedAnswer = answer
+            elif kind == "comment":
+                comment_obj = Comment(self.users[record["author_id"]], self._findPost(record), record["comment"],
+                                      id=id, creationDate=_parseDate(record.get("creationDate")))
+                self.comments[comment_obj.id] = comment_obj
+                comment_obj.author.comments.append(comment_obj)
+            else:
+                if record["vote"] not in (1, -1):
+                    raise ValueError("Vote must be 1 or -1.")
+                vote_obj = Vote(self.users[record["author_id"]], self._findPost(record), record["vote"],
+                                id=id, creationDate=_parseDate(record.get("creationDate")))
+                self.votes[vote_obj.id] = vote_obj
+            count += 1
+        self.rebuildIndexes()
+        return count
+
+    def _findPost(self, record):
+        if record["target"] == "question":
+            return self.questions[record["target_id"]]
+        return self.answers[record["target_id"]]
+
+    def rebuildIndexes(self):
+        self.search_index = SearchIndex()
+        for question in self.questions.values():
+            self.search_index.addQuestion(question)
+        for answer in self.answers.values():
+            self.search_index.addAnswer(answer)
+        self.feeds.build(self.questions.values())
+        self.recomputeReputation()
+
+    def exportRecords(self):
+        # A generator over the live objects, so a snapshot never holds a second copy of the data
+        for user in self.users.values():
+            yield {"type": "user", "id": user.id, "username": user.username, "email": user.email}
+        for question in self.questions.values():
+            yield {"type": "question", "id": question.id, "author_id": question.author.id,
+                   "title": question.title, "content": question.content,
+                   "tags": [tag.title for tag in question.tags],
+                   "creationDate": question.creationDate.isoformat(),
+                   "creationTime": question.creationTime, "lastActivity": question.lastActivity}
+        for answer in self.answers.values():
+            yield {"type": "answer", "id": answer.id, "question_id": answer.question.id,
+                   "author_id": answer.author.id, "content": answer.content, "accepted": answer.isAccepted,
+                   "creationDate": answer.creationDate.isoformat()}
+        for comment_obj in self.comments.values():
+            yield {"type": "comment", "id": comment_obj.id, **_postRef(comment_obj.commentable),
+                   "author_id": comment_obj.author.id, "comment": comment_obj.comment,
+                   "creationDate": comment_obj.creationDate.isoformat()}
+        # Votes are exported from the per-post maps so changed and removed votes are not replayed
+        for post in itertools.chain(self.questions.values(), self.answers.values()):
+            for user, vote in post.votes.values():
+                yield {"type": "vote", **_postRef(post), "author_id": user.id, "vote": vote}
+
+
+    def acceptAnswer(self, user, answer):
+        question = answer.question
+        if question.author is not user:
+            raise ValueError("Only the question author can accept an answer.")
+        with question.lock:
+            if question.acceptedAnswer is answer:
+                return answer
+            if question.acceptedAnswer is not None:
+                question.acceptedAnswer.isAccepted = False
+                self.reputation.onAccept(question.acceptedAnswer, accepted=False)
+            answer.isAccepted = True
+            question.acceptedAnswer = answer
+            self.reputation.onAccept(answer)
+        return answer
+
+    def recomputeReputation(self):
+        self.reputation.recompute(self.users.values(), self.questions.values(), self.answers.values())
+
     def findUser(self, username):
-        for user in self.users:
-            if user.username == username:
-                return user
-        return None
+        return self.users_by_name.get(username)
 
     def findQuestion(self, question_id):
-        for question in self.questions:
-            if question.id == question_id:
-                return question
-        return None
+        return self.questions.get(question_id)
 
     def findAnswer(self, answer_id):
-        for answer in self.answers:
-            if answer.id == answer_id:
-                return answer
-        return None
+        return self.answers.get(answer_id)
+
+    def getUserQuestions(self, username):
+        user = self.findUser(username)
+        return user.questions if user else []
+
+    def getUserAnswers(self, username):
+        user = self.findUser(username)
+        return user.answers if user else []
+
+    def searchQuestions(self, query, tag_titles=None, k=10):
+        tags = None
+        if tag_titles:
+            tags = [self.tags[title] for title in tag_titles if title in self.tags]
+            if not tags:
+                return []
+        return self.search_index.search(query, tags, k)
+
+
+def _questionOf(post):
+    return post if isinstance(post, Question) else post.question
+
+def _parseDate(value):
+    return datetime.date.fromisoformat(value) if value else None
+
+def _postRef(post):
+    return {"target": "question" if isinstance(post, Question) else "answer", "target_id": post.id}
+
+def readJsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def writeJsonl(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record))
+            f.write("\n")
+
+CSV_FIELDS = {
+    "user": ["id", "username", "email"],
+    "question": ["id", "author_id", "title", "content", "tags", "creationDate", "creationTime", "lastActivity"],
+    "answer": ["id", "question_id", "author_id", "content", "accepted", "creationDate"],
+    "comment": ["id", "target", "target_id", "author_id", "comment", "creationDate"],
+    "vote": ["target", "target_id", "author_id", "vote"],
+}
+CSV_INT_FIELDS = {"id", "author_id", "question_id", "target_id", "vote"}
+CSV_FLOAT_FIELDS = {"creationTime", "lastActivity"}
+
+def readCsv(directory):
+    # One <type>.csv file per record type, read in dependency order; tags are "|"-separated
+    for kind, fields in CSV_FIELDS.items():
+        path = os.path.join(directory, f"{kind}.csv")
+        if not os.path.exists(path):
+            continue
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                record = {"type": kind}
+                for field in fields:
+                    value = row.get(field, "")
+                    if field in CSV_INT_FIELDS:
+                        value = int(value) if value != "" else None
+                    elif field in CSV_FLOAT_FIELDS:
+                        value = float(value) if value != "" else None
+                    elif field == "tags":
+                        value = value.split("|") if value else []
+                    elif field == "accepted":
+                        value = value == "True"
+                    record[field] = value
+                yield record
+
+def writeCsv(directory, records):
+    os.makedirs(directory, exist_ok=True)
+    files = {}
+    writers = {}
+    try:
+        for record in records:
+            kind = record["type"]
+            if kind not in writers:
+                files[kind] = open(os.path.join(directory, f"{kind}.csv"), "w", newline="", encoding="utf-8")
+                writers[kind] = csv.DictWriter(files[kind], fieldnames=CSV_FIELDS[kind], extrasaction="ignore")
+                writers[kind].writeheader()
+            if kind == "question":
+                record = dict(record, tags="|".join(record["tags"]))
+            writers[kind].writerow(record)
+    finally:
+        for f in files.values():
+            f.close()
+
+
+def runStressBenchmark(threads=16, operations_per_thread=2000, question_count=50):
+    # Hammers votes, vote changes and comments from many threads, then checks that the
+    # running counters and reputation agree with a from-scratch recompute.
+    platform = StackOverFlow()
+    authors = [platform.addUser(f"author{i}", f"author{i}@example.com") for i in range(10)]
+    voters = [platform.addUser(f"voter{i}", f"voter{i}@example.com") for i in range(threads * 4)]
+    questions = [platform.addQuestion(authors[i % len(authors)], f"Question {i}", "stress", [f"tag{i % 5}"])
+                 for i in range(question_count)]
+    answers = [platform.addAnswer(authors[(i + 1) % len(authors)], question, "answer")
+               for i, question in enumerate(questions)]
+
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(operations_per_thread):
+            user = rng.choice(voters)
+            post = rng.choice(questions) if rng.random() < 0.5 else rng.choice(answers)
+            action = rng.random()
+            if action < 0.6:
+                vote = rng.choice((1, -1))
+                if isinstance(post, Question):
+                    platform.addVoteToQuestion(user, post, vote)
+                else:
+                    platform.addVoteToAnswer(user, post, vote)
+            elif action < 0.7:
+                platform.removeVote(user, post)
+            elif isinstance(post, Question):
+                platform.addCommentToQuestion(user, post, "stress comment")
+            else:
+                platform.addCommentToAnswer(user, post, "stress comment")
+
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    for post in questions + answers:
+        assert post.getScore() == sum(vote for _, vote in post.votes.values())
+    expected_comments = sum(len(post.comments) for post in questions + answers)
+    assert expected_comments == len(platform.comments)
+    live = {user.id: user.reputation for user in platform.users.values()}
+    platform.recomputeReputation()
+    assert live == {user.id: user.reputation for user in platform.users.values()}
+
+    total = threads * operations_per_thread
+    print(f"Stress: {total} operations on {threads} threads in {elapsed:.2f}s "
+          f"({total / elapsed:,.0f} ops/s), invariants hold")
+    return total / elapsed
 
 
 if __name__ == "__main__":
@@ -244,7 +916,7 @@ if __name__ == "__main__":
 
     # Print user information
     print("Users:")
-    for user in platform.users:
+    for user in platform.users.values():
         print(f"ID: {user.id}, Username: {user.username}, Email: {user.email}")
 
     # Adding some tags
@@ -266,15 +938,18 @@ if __name__ == "__main__":
     # Adding votes
     vote1 = platform.addVoteToQuestion(user2, question1, 1)
     vote2 = platform.addVoteToAnswer(user1, answer1, 1)
+    platform.addVoteToAnswer(user2, answer2, -1)
+    platform.addVoteToAnswer(user2, answer2, 1)  # Changing a vote replaces the earlier one
+    platform.acceptAnswer(user1, answer1)
 
     # Printing the details of questions, answers, comments, and votes
     print("\nQuestions:")
-    for question in platform.questions:
+    for question in platform.questions.values():
         print(f"Title: {question.title}, Content: {question.content}, Tags: {[tag.title for tag in question.tags]}")
         print("Comments on Question:")
         for comment in question.getComments():
             print(f"  {comment[0].username} said: {comment[1]}")
-        print("Votes on Question:")
+        print(f"Votes on Question (score {question.getScore()}):")
         for vote in question.getVotes():
             print(f"  {vote[0].username} voted: {vote[1]}")
         print("Answers:")
@@ -289,7 +964,46 @@ if __name__ == "__main__":
 
     # Printing tags and associated questions
     print("\nTags and Associated Questions:")
-    for tag in platform.tags:
+    for tag in platform.tags.values():
         print(f"Tag: {tag.title}")
         for question in tag.questions:
             print(f"  Question: {question.title}")
+
+    print("\nReputation:")
+    for user in platform.users.values():
+        print(f"  {user.username}: {user.reputation}")
+
+    # Ranked feeds with cursor pagination
+    for kind in QuestionFeeds.KINDS:
+        page, cursor = platform.getQuestionFeed(kind, limit=1)
+        next_page, _ = platform.getQuestionFeed(kind, cursor=cursor, limit=1)
+        print(f"\nFeed '{kind}':", [q.title for q in page + next_page])
+    page, _ = platform.getQuestionFeed("votes", tag_title="python")
+    print("Most voted in 'python':", [q.title for q in page])
+
+    # Per-user lookups
+    print("\nQuestions asked by john_doe:", [q.title for q in platform.getUserQuestions("john_doe")])
+    print("Answers by jane_smith:", [a.id for a in platform.getUserAnswers("jane_smith")])
+
+    # Full-text search over questions and their answers
+    print("\nSearch results for 'python lists':")
+    for question, score in platform.searchQuestions("python lists"):
+        print(f"  {score:.3f} {question.title}")
+    print("Search results for 'learn' within tag 'machine-learning':")
+    for question, score in platform.searchQuestions("learn", ["machine-learning"]):
+        print(f"  {score:.3f} {question.title}")
+
+    # Streaming snapshot round trip
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        writeJsonl(os.path.join(tmp, "dump.jsonl"), platform.exportRecords())
+        restored = StackOverFlow()
+        restored.bulkLoad(readJsonl(os.path.join(tmp, "dump.jsonl")))
+        writeCsv(tmp, restored.exportRecords())
+        from_csv = StackOverFlow()
+        from_csv.bulkLoad(readCsv(tmp))
+    print("\nRestored reputation:", {u.username: u.reputation for u in from_csv.users.values()})
+    print("Restored search:", [q.title for q, _ in from_csv.searchQuestions("python lists")])
+
+    # Concurrent writers
+    runStressBenchmark(threads=8, operations_per_thread=500)
@@ -9,16 +9,33 @@
    - Values: FIRST = 1 (6:30 PM to 8:00 PM), SECOND = 2 (8:00 PM to 9:30 PM), THIRD = 3 (9:30 PM to 11:00 PM)
 
 3. **Table**: Represents a single dining table in the restaurant.
-   - Attributes: table_id, size (TableSize), reservations (defaultdict of sets)
-   - Methods: is_available(date, slot), book_slot(date, slot), free_slot(date, slot)
+   - Attributes: table_id, size (TableSize), index (bit in the free bitmaps), intervals (date -> sorted (start, end) minutes), versions
+   - Methods: is_free(date, start, end) [O(log n) with bisect], book(date, start, end), free(date, start, end)
+   - Methods: is_available(date, slot), book_slot(date, slot), free_slot(date, slot) [fixed slots via SLOT_MINUTES]
 
-4. **Reservation**: Represents a booking for a specific table at a specific time.
-   - Attributes: reservation_id, table (Table), date, slot (TimeSlot), party_size
+4. **ReservationStatus (Enum) / ReservationResult**: Typed outcome of book, modify and cancel.
+   - Attributes: status, reservation; truthy on success
+
+5. **Reservation**: Represents a booking for a specific table at a specific time.
+   - Attributes: reservation_id, table (Table), tables (all tables of a combined seating), date, slot (TimeSlot, or None for arbitrary length), party_size, start, end
    - Auto-increments reservation_id for new reservations.
 
-5. **ReservationManager**: Central system to manage all tables and reservations.
-   - Attributes: tables (dict of lists, sorted by TableSize), reservations (dict), next_table_id
+6. **ReservationManager**: Central system to manage all tables and reservations.
+   - Attributes: tables (dict of lists, sorted by TableSize), reservations (date -> {id: Reservation}), next_table_id
+   - Attributes: reservations_by_id, reservations_by_table, tables_by_id [O(1) lookup, cancel and modify], adjacent (tables that can be pushed together)
+   - Attributes: free_tables ((date, slot) -> per-size bitmap of free tables)
    - Methods: create_table(size, quantity), find_available_table(party_size, date, slot), book_table(party_size, date, slot), cancel_reservation(reservation_id)
+   - Methods: find_available_table_at(party_size, date, start, end), book_interval(party_size, date, start, duration_minutes)
+   - Methods: get_reservation(id), reservations_on(date), reservations_for_table(table_id, date), modify_reservation(id, party_size, date, slot, start, duration_minutes)
+   - Methods: connect_tables(*table_ids), find_combination(party_size, date, start, end), assign_batch(party_sizes, date, slot)
+
+7. **min_cost_assignment(party_sizes, free_by_size)**: Min-cost flow that seats the most covers, then wastes the fewest seats.
+
+8. **Concurrency**: ReservationManager is safe to call from many threads.
+   - Table.versions (date -> change count) lets a booking search without the lock and commit only if its tables did not change.
+   - WaitlistEntry (entry_id, party_size, date, slot, status, reservation): book_or_waitlist(party_size, date, slot, on_promoted), leave_waitlist(entry); cancellations promote waiting parties automatically.
+   - AsyncReservationDesk: asyncio API (book_table, book_interval, cancel_reservation, modify_reservation, wait_for_table).
+   - run_booking_stress_test(threads, requests_per_thread, tables_per_size, tasks) + check_no_double_booking(manager).
 
 #### Usage:
 - **Initialization**: Start with creating an instance of `ReservationManager`.
@@ -34,8 +51,14 @@
 
   """
 
+import asyncio
+import random
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
 from enum import Enum
-from collections import defaultdict
+from collections import defaultdict, deque
 
 class TableSize(Enum):
     SMALL = 2
@@ -47,85 +70,701 @@ class TimeSlot(Enum):
     SECOND = 2 # 8:00 PM to 9:30 PM
     THIRD = 3  # 9:30 PM to 11:00 PM
 
+# Each fixed slot is an interval in minutes after midnight, so slot bookings and
+# arbitrary-length bookings share one interval list per table and date
+SLOT_MINUTES = {
+    TimeSlot.FIRST: (18 * 60 + 30, 20 * 60),
+    TimeSlot.SECOND: (20 * 60, 21 * 60 + 30),
+    TimeSlot.THIRD: (21 * 60 + 30, 23 * 60),
+}
+MINUTES_PER_DAY = 24 * 60
+
+MAX_COMBINED_TABLES = 3  # Most tables pushed together for one party
+MAX_OPTIMISTIC_ATTEMPTS = 4  # Lost version races before a booking searches under the lock
+
+def to_minutes(time_of_day):
+    # "19:45" -> 1185; minute counts pass through unchanged
+    if isinstance(time_of_day, str):
+        hours, minutes = time_of_day.split(':')
+        return int(hours) * 60 + int(minutes)
+    return time_of_day
+
+def valid_interval(start, end):
+    # Intervals live within one date, so a booking that runs past midnight is rejected
+    return 0 <= start < end <= MINUTES_PER_DAY
+
+def format_minutes(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
 class Table:
-    def __init__(self, table_id, size):
+    def __init__(self, table_id, size, index=0):
         self.table_id = table_id
         self.size = size
-        self.reservations = defaultdict(set)
+        self.index = index  # Position among tables of this size, i.e. its bit in the free bitmaps
+        # date -> sorted, non-overlapping (start, end) intervals in minutes
+        # Lists are replaced, never edited in place, so a reader holding one sees a consistent
+        # snapshot while another thread books or frees the table.
+        self.intervals = {}
+        # date -> count of changes, bumped after every book/free so optimistic bookings can
+        # tell whether the table changed between their availability check and their commit
+        self.versions = {}
 
-    def is_available(self, date, slot):
-        return slot not in self.reservations[date]
+    def is_free(self, date, start, end):
+        # Intervals are disjoint and sorted, so only the last one starting before `end` can overlap
+        intervals = self.intervals.get(date)
+        if not intervals:
+            return True
+        i = bisect_left(intervals, (end,))
+        return i == 0 or intervals[i - 1][1] <= start
 
-    def book_slot(self, date, slot):
-        if not self.is_available(date, slot):
+    def book(self, date, start, end):
+        if not self.is_free(date, start, end):
             return False
-        self.reservations[date].add(slot)
+        intervals = list(self.intervals.get(date, ()))
+        insort(intervals, (start, end))
+        self.intervals[date] = intervals
+        self.versions[date] = self.versions.get(date, 0) + 1
         return True
 
-    def free_slot(self, date, slot):
-        if slot in self.reservations[date]:
-            self.reservations[date].remove(slot)
-            if not self.reservations[date]:  # If no more reservations, delete the date key
-                del self.reservations[date]
-            return True
+    def free(self, date, start, end):
+        intervals = self.intervals.get(date)
+        if intervals:
+            i = bisect_left(intervals, (start, end))
+            if i < len(intervals) and intervals[i] == (start, end):
+                if len(intervals) == 1:  # If no more reservations, delete the date key
+                    del self.intervals[date]
+                else:
+                    self.intervals[date] = intervals[:i] + intervals[i + 1:]
+                self.versions[date] = self.versions.get(date, 0) + 1
+                return True
         return False
 
+    def is_available(self, date, slot):
+        return self.is_free(date, *SLOT_MINUTES[slot])
+
+    def book_slot(self, date, slot):
+        return self.book(date, *SLOT_MINUTES[slot])
+
+    def free_slot(self, date, slot):
+        return self.free(date, *SLOT_MINUTES[slot])
+
     def __str__(self):
-        return f"Table ID: {self.table_id}, Size: {self.size}, Reservations: {self.reservations}"
+        booked = {date: [f"{format_minutes(start)}-{format_minutes(end)}" for start, end in intervals]
+                  for date, intervals in self.intervals.items()}
+        return f"Table ID: {self.table_id}, Size: {self.size}, Reservations: {booked}"
 
 class Reservation:
     _id_counter = 1
 
-    def __init__(self, table, date, slot, party_size):
+    def __init__(self, table, date, slot, party_size, start=None, end=None, tables=None):
         self.reservation_id = Reservation._id_counter
         Reservation._id_counter += 1
-        self.table = table
+        self.tables = tables or [table]  # Several adjacent tables pushed together for a large party
+        self.table = self.tables[0]
         self.date = date
-        self.slot = slot
+        self.slot = slot  # None for an arbitrary-length booking
         self.party_size = party_size
+        if slot is not None:
+            start, end = SLOT_MINUTES[slot]
+        self.start = start
+        self.end = end
 
     def __str__(self):
-        return (f"Reservation ID: {self.reservation_id}, Table: {self.table.table_id}, "
-                f"Date: {self.date}, Slot: {self.slot.name}, Party Size: {self.party_size}")
+        when = self.slot.name if self.slot is not None else f"{format_minutes(self.start)}-{format_minutes(self.end)}"
+        table_ids = '+'.join(str(table.table_id) for table in self.tables)
+        return (f"Reservation ID: {self.reservation_id}, Table: {table_ids}, "
+                f"Date: {self.date}, Slot: {when}, Party Size: {self.party_size}")
+
+class ReservationStatus(Enum):
+    BOOKED = "Reservation booked."
+    MODIFIED = "Reservation modified."
+    CANCELLED = "Reservation cancelled."
+    NO_AVAILABLE_TABLE = "No available table."
+    NOT_FOUND = "Reservation not found."
+    WAITLISTED = "Added to the waitlist."
+    INVALID_TIME = "Invalid time: bookings must be non-empty and end by midnight."
+
+class ReservationResult:
+    # Outcome of a booking operation; truthy on success, and prints like the old string results
+    def __init__(self, status, reservation=None, waitlist_entry=None):
+        self.status = status
+        self.reservation = reservation
+        self.waitlist_entry = waitlist_entry
+
+    @property
+    def ok(self):
+        return self.status in (ReservationStatus.BOOKED, ReservationStatus.MODIFIED, ReservationStatus.CANCELLED)
+
+    def __bool__(self):
+        return self.ok
+
+    def __str__(self):
+        if self.status in (ReservationStatus.BOOKED, ReservationStatus.MODIFIED):
+            return str(self.reservation)
+        return self.status.value
+
+class WaitlistEntry:
+    _id_counter = 1
+
+    def __init__(self, party_size, date, slot, on_promoted=None):
+        self.entry_id = WaitlistEntry._id_counter
+        WaitlistEntry._id_counter += 1
+        self.party_size = party_size
+        self.date = date
+        self.slot = slot
+        self.on_promoted = on_promoted  # Called with the entry once it holds a reservation
+        self.status = 'waiting'  # waiting -> promoted | left
+        self.reservation = None
 
 class ReservationManager:
     def __init__(self):
         self.tables = {size: [] for size in TableSize}
-        self.reservations = {}
+        self.reservations = {}  # date -> {reservation_id: Reservation}
+        self.reservations_by_id = {}
+        self.reservations_by_table = defaultdict(dict)  # table_id -> {reservation_id: Reservation}
+        self.tables_by_id = {}
+        self.adjacent = defaultdict(set)  # table_id -> ids of tables it can be pushed together with
         self.next_table_id = 1
+        # (date, slot) -> {size: int bitmap}, bit i set when tables[size][i] is free for the
+        # slot. Built on first use of a (date, slot) and kept in step by every booking after.
+        self.free_tables = {}
+        self.waitlists = defaultdict(deque)  # (date, slot) -> WaitlistEntry, first come first served
+        # Guards every write. Searches read without it and are validated by table versions.
+        self._lock = threading.RLock()
 
     def create_table(self, size, quantity):
+        with self._lock:
+            self._create_tables(size, quantity)
+
+    def _create_tables(self, size, quantity):
         for _ in range(quantity):
-            new_table = Table(table_id=self.next_table_id, size=size)
+            new_table = Table(table_id=self.next_table_id, size=size, index=len(self.tables[size]))
             self.tables[size].append(new_table)
+            self.tables_by_id[new_table.table_id] = new_table
             self.next_table_id += 1
+            for bitmaps in self.free_tables.values():
+                bitmaps[size] |= 1 << new_table.index
+
+    def connect_tables(self, *table_ids):
+        # Marks a row of tables, each one next to the following, as combinable
+        for a, b in zip(table_ids, table_ids[1:]):
+            self.adjacent[a].add(b)
+            self.adjacent[b].add(a)
+
+    def _free_bitmaps(self, date, slot):
+        bitmaps = self.free_tables.get((date, slot))
+        if bitmaps is None:
+            with self._lock:  # Built under the lock so no concurrent booking is missed
+                bitmaps = self.free_tables.get((date, slot))
+                if bitmaps is None:
+                    bitmaps = {size: sum(1 << table.index for table in tables if table.is_available(date, slot))
+                               for size, tables in self.tables.items()}
+                    self.free_tables[date, slot] = bitmaps
+        return bitmaps
+
+    def _refresh_bitmaps(self, table, date):
+        # A booking of any length can cover several fixed slots; re-check the (at most three) built ones
+        bit = 1 << table.index
+        for slot in TimeSlot:
+            bitmaps = self.free_tables.get((date, slot))
+            if bitmaps is not None:
+                if table.is_available(date, slot):
+                    bitmaps[table.size] |= bit
+                else:
+                    bitmaps[table.size] &= ~bit
 
     def find_available_table(self, party_size, date, slot):
+        # Smallest fitting size first, lowest free table of that size via the lowest set bit
+        bitmaps = self._free_bitmaps(date, slot)
+        for size in TableSize:
+            if size.value >= party_size and bitmaps[size]:
+                bits = bitmaps[size]
+                return self.tables[size][(bits & -bits).bit_length() - 1]
+        return None
+
+    def find_available_table_at(self, party_size, date, start, end):
         for size in TableSize:
             if size.value >= party_size:
                 for table in self.tables[size]:
-                    if table.is_available(date, slot):
+                    if table.is_free(date, start, end):
                         return table
         return None
 
+    def find_combination(self, party_size, date, start, end):
+        """
+        Smallest-waste group of 2..MAX_COMBINED_TABLES adjacent tables, all free for
+        [start, end), that together seat the party; fewer tables wins a tie. Groups are
+        grown one neighbour at a time from each free table, so only connected groups count.
+        """
+        free = {table.table_id for table in self.tables_by_id.values() if table.is_free(date, start, end)}
+        best, best_key = None, None
+        seen = set()
+        frontier = [frozenset([table_id]) for table_id in free]
+        for _ in range(MAX_COMBINED_TABLES - 1):
+            grown = []
+            for group in frontier:
+                for table_id in group:
+                    for neighbour in self.adjacent[table_id]:
+                        if neighbour in free and neighbour not in group:
+                            bigger = group | {neighbour}
+                            if bigger not in seen:
+                                seen.add(bigger)
+                                grown.append(bigger)
+            for group in grown:
+                seats = sum(self.tables_by_id[table_id].size.value for table_id in group)
+                key = (seats - party_size, len(group))
+                if seats >= party_size and (best_key is None or key < best_key):
+                    best, best_key = group, key
+            frontier = grown
+        return [self.tables_by_id[table_id] for table_id in sorted(best)] if best else None
+
+    def _book_tables(self, tables, date, start, end):
+        for table in tables:
+            table.book(date, start, end)
+            self._refresh_bitmaps(table, date)
+        return tables
+
+    def _choose(self, party_size, date, start, end, slot=None, preferred=None):
+        """
+        Picks seating for [start, end) without booking it. `preferred` (a reservation's
+        current tables) is kept when still free and not oversized; otherwise the smallest
+        fitting single table, then a combination of adjacent tables.
+        """
+        if (preferred and all(table.is_free(date, start, end) for table in preferred)
+                and party_size <= sum(table.size.value for table in preferred)
+                and (len(preferred) == 1 or party_size > sum(table.size.value for table in preferred)
+                     - min(table.size.value for table in preferred))):
+            return preferred
+        if slot is not None:
+            table = self.find_available_table(party_size, date, slot)
+        else:
+            table = self.find_available_table_at(party_size, date, start, end)
+        return [table] if table is not None else self.find_combination(party_size, date, start, end)
+
+    def _claim(self, party_size, date, start, end, slot=None, preferred=None):
+        """
+        Books seating for [start, end) and returns its tables, or None. Optimistic: the search
+        runs without the lock, then each chosen table's version for the date is read before
+        re-checking that it is free, and the booking commits under the lock only if no version
+        moved in between. After MAX_OPTIMISTIC_ATTEMPTS lost races it searches under the lock.
+        """
+        for _ in range(MAX_OPTIMISTIC_ATTEMPTS):
+            tables = self._choose(party_size, date, start, end, slot, preferred)
+            if tables is None:
+                return None
+            versions = [table.versions.get(date, 0) for table in tables]
+            if not all(table.is_free(date, start, end) for table in tables):
+                continue
+            with self._lock:
+                if all(table.versions.get(date, 0) == version for table, version in zip(tables, versions)):
+                    return self._book_tables(tables, date, start, end)
+        with self._lock:
+            tables = self._choose(party_size, date, start, end, slot, preferred)
+            return self._book_tables(tables, date, start, end) if tables else None
+
+    def _release(self, reservation):
+        for table in reservation.tables:
+            table.free(reservation.date, reservation.start, reservation.end)
+            self._refresh_bitmaps(table, reservation.date)
+
+    def _index(self, reservation):
+        self.reservations_by_id[reservation.reservation_id] = reservation
+        self.reservations.setdefault(reservation.date, {})[reservation.reservation_id] = reservation
+        for table in reservation.tables:
+            self.reservations_by_table[table.table_id][reservation.reservation_id] = reservation
+
+    def _unindex(self, reservation):
+        del self.reservations_by_id[reservation.reservation_id]
+        on_date = self.reservations[reservation.date]
+        del on_date[reservation.reservation_id]
+        if not on_date:
+            del self.reservations[reservation.date]
+        for table in reservation.tables:
+            on_table = self.reservations_by_table[table.table_id]
+            del on_table[reservation.reservation_id]
+            if not on_table:
+                del self.reservations_by_table[table.table_id]
+
     def book_table(self, party_size, date, slot):
-        table = self.find_available_table(party_size, date, slot)
-        if table and table.book_slot(date, slot):
-            new_reservation = Reservation(table=table, date=date, slot=slot, party_size=party_size)
-            self.reservations.setdefault(date, []).append(new_reservation)
-            return new_reservation
-        return "No available table."
+        start, end = SLOT_MINUTES[slot]
+        tables = self._claim(party_size, date, start, end, slot=slot)
+        if tables is None:
+            return ReservationResult(ReservationStatus.NO_AVAILABLE_TABLE)
+        return self._seat(party_size, date, slot, tables)
+
+    def book_interval(self, party_size, date, start, duration_minutes):
+        # Books any start time ("19:45" or minutes after midnight) and length
+        start = to_minutes(start)
+        end = start + duration_minutes
+        if not valid_interval(start, end):
+            return ReservationResult(ReservationStatus.INVALID_TIME)
+        tables = self._claim(party_size, date, start, end)
+        if tables is None:
+            return ReservationResult(ReservationStatus.NO_AVAILABLE_TABLE)
+        return self._seat(party_size, date, None, tables, start, end)
+
+    def get_reservation(self, reservation_id):
+        return self.reservations_by_id.get(reservation_id)
+
+    def reservations_on(self, date):
+        return list(self.reservations.get(date, {}).values())
+
+    def reservations_for_table(self, table_id, date=None):
+        reservations = self.reservations_by_table.get(table_id, {}).values()
+        return [reservation for reservation in reservations if date is None or reservation.date == date]
 
     def cancel_reservation(self, reservation_id):
-        for date, reservations in self.reservations.items():
-            for reservation in reservations:
-                if reservation.reservation_id == reservation_id:
-                    if reservation.table.free_slot(reservation.date, reservation.slot):
-                        reservations.remove(reservation)
-                        if not reservations:
-                            del self.reservations[date]
-                        return "Reservation cancelled."
-        return "Reservation not found."
+        with self._lock:
+            reservation = self.reservations_by_id.get(reservation_id)
+            if reservation is None:
+                return ReservationResult(ReservationStatus.NOT_FOUND)
+            self._release(reservation)
+            self._unindex(reservation)
+            self._promote_waitlist(reservation.date, reservation.start, reservation.end)
+            return ReservationResult(ReservationStatus.CANCELLED, reservation)
+
+    def modify_reservation(self, reservation_id, party_size=None, date=None, slot=None, start=None,
+                           duration_minutes=None):
+        """
+        Moves a reservation to a new party size, date, slot or time, keeping its id and, when
+        it still fits, its table. If nothing fits the original booking is left untouched.
+        Passing start/duration_minutes turns a slot booking into an arbitrary-length one.
+        """
+        with self._lock:  # Release and re-claim must not interleave with other bookings
+            reservation = self.reservations_by_id.get(reservation_id)
+            if reservation is None:
+                return ReservationResult(ReservationStatus.NOT_FOUND)
+            party_size = party_size if party_size is not None else reservation.party_size
+            date = date if date is not None else reservation.date
+            if slot is None and start is None and duration_minutes is None:
+                slot = reservation.slot
+            if slot is not None:
+                new_start, new_end = SLOT_MINUTES[slot]
+            else:
+                new_start = to_minutes(start) if start is not None else reservation.start
+                new_end = new_start + (duration_minutes if duration_minutes is not None
+                                       else reservation.end - reservation.start)
+                if not valid_interval(new_start, new_end):
+                    return ReservationResult(ReservationStatus.INVALID_TIME, reservation)
+            self._release(reservation)
+            tables = self._claim(party_size, date, new_start, new_end, slot=slot, preferred=reservation.tables)
+            if tables is None:
+                # The old interval was freed a moment ago, so it can always be taken back
+                self._book_tables(reservation.tables, reservation.date, reservation.start, reservation.end)
+                return ReservationResult(ReservationStatus.NO_AVAILABLE_TABLE, reservation)
+            self._unindex(reservation)
+            old_date, old_start, old_end = reservation.date, reservation.start, reservation.end
+            reservation.tables, reservation.table = tables, tables[0]
+            reservation.date, reservation.slot = date, slot
+            reservation.party_size, reservation.start, reservation.end = party_size, new_start, new_end
+            self._index(reservation)
+            self._promote_waitlist(old_date, old_start, old_end)
+            return ReservationResult(ReservationStatus.MODIFIED, reservation)
+
+    def assign_batch(self, party_sizes, date, slot):
+        """
+        Seats a batch of pending requests for one slot, maximizing covers rather than serving
+        requests first come, first served. Single-table seating is solved exactly with
+        min_cost_assignment; requests it leaves out (including parties larger than any table)
+        then try combinations of adjacent tables, largest party first.
+        Returns one ReservationResult per request, in request order.
+        """
+        with self._lock:
+            return self._assign_batch(party_sizes, date, slot)
+
+    def _assign_batch(self, party_sizes, date, slot):
+        start, end = SLOT_MINUTES[slot]
+        bitmaps = self._free_bitmaps(date, slot)
+        free_by_size = {size.value: bin(bitmaps[size]).count('1') for size in TableSize}
+        results = [ReservationResult(ReservationStatus.NO_AVAILABLE_TABLE) for _ in party_sizes]
+        for i, seats in enumerate(min_cost_assignment(party_sizes, free_by_size)):
+            if seats is not None:
+                size = TableSize(seats)
+                bits = bitmaps[size]
+                table = self.tables[size][(bits & -bits).bit_length() - 1]
+                results[i] = self._seat(party_sizes[i], date, slot, self._book_tables([table], date, start, end))
+        for i in sorted(range(len(party_sizes)), key=lambda i: party_sizes[i], reverse=True):
+            if not results[i]:
+                tables = self.find_combination(party_sizes[i], date, start, end)
+                if tables:
+                    results[i] = self._seat(party_sizes[i], date, slot, self._book_tables(tables, date, start, end))
+        return results
+
+    def _seat(self, party_size, date, slot, tables, start=None, end=None):
+        with self._lock:
+            new_reservation = Reservation(table=tables[0], date=date, slot=slot, party_size=party_size,
+                                          start=start, end=end, tables=tables)
+            self._index(new_reservation)
+        return ReservationResult(ReservationStatus.BOOKED, new_reservation)
+
+    def book_or_waitlist(self, party_size, date, slot, on_promoted=None):
+        # Books now if a table is free, otherwise queues the party for the slot
+        with self._lock:
+            result = self.book_table(party_size, date, slot)
+            if result:
+                return result
+            entry = WaitlistEntry(party_size, date, slot, on_promoted)
+            self.waitlists[date, slot].append(entry)
+            return ReservationResult(ReservationStatus.WAITLISTED, waitlist_entry=entry)
+
+    def leave_waitlist(self, entry):
+        with self._lock:
+            if entry.status == 'waiting':
+                entry.status = 'left'  # Dropped from the queue at the next promotion pass
+                return True
+            return False
+
+    def _promote_waitlist(self, date, start, end):
+        # Seats waiting parties of every slot overlapping the freed [start, end), in queue
+        # order; a party that still does not fit keeps its place while smaller ones behind it move up
+        for slot in TimeSlot:
+            slot_start, slot_end = SLOT_MINUTES[slot]
+            queue = self.waitlists.get((date, slot))
+            if not queue or slot_end <= start or end <= slot_start:
+                continue
+            waiting = deque()
+            for entry in queue:
+                if entry.status != 'waiting':
+                    continue
+                result = self.book_table(entry.party_size, date, slot)
+                if not result:
+                    waiting.append(entry)
+                    continue
+                entry.status, entry.reservation = 'promoted', result.reservation
+                if entry.on_promoted is not None:
+                    entry.on_promoted(entry)
+            if waiting:
+                self.waitlists[date, slot] = waiting
+            else:
+                del self.waitlists[date, slot]
+
+def min_cost_assignment(party_sizes, free_by_size):
+    """
+    Assigns parties to table sizes ({seats: free tables}) by min-cost flow: source -> party
+    (capacity 1) -> every size that fits it -> sink (capacity = free tables of that size).
+    An edge costs the wasted seats minus party_size * weight, with weight larger than any
+    possible total waste, so the flow seats the most covers first and wastes the fewest seats
+    second. Successive shortest paths with Bellman-Ford (costs are negative) stop once no
+    path lowers the cost. Returns the assigned size per party, or None if it is not seated.
+    """
+    sizes = sorted(size for size, count in free_by_size.items() if count)
+    parties = len(party_sizes)
+    source, sink = 0, parties + len(sizes) + 1
+    graph = [[] for _ in range(sink + 1)]  # node -> [to, capacity, cost, index of reverse edge]
+
+    def add_edge(u, v, capacity, cost):
+        graph[u].append([v, capacity, cost, len(graph[v])])
+        graph[v].append([u, 0, -cost, len(graph[u]) - 1])
+
+    weight = max(sizes, default=0) * parties + 1
+    for i, party_size in enumerate(party_sizes):
+        add_edge(source, 1 + i, 1, 0)
+        for j, seats in enumerate(sizes):
+            if seats >= party_size:
+                add_edge(1 + i, 1 + parties + j, 1, seats - party_size - party_size * weight)
+    for j, seats in enumerate(sizes):
+        add_edge(1 + parties + j, sink, free_by_size[seats], 0)
+
+    while True:
+        distance = [float('inf')] * len(graph)
+        parent = [None] * len(graph)
+        distance[source] = 0
+        for _ in range(len(graph) - 1):
+            changed = False
+            for u, edges in enumerate(graph):
+                if distance[u] == float('inf'):
+                    continue
+                for k, (v, capacity, cost, _) in enumerate(edges):
+                    if capacity and distance[u] + cost < distance[v]:
+                        distance[v] = distance[u] + cost
+                        parent[v] = (u, k)
+                        changed = True
+            if not changed:
+                break
+        if distance[sink] >= 0:
+            break
+        v = sink
+        while v != source:
+            u, k = parent[v]
+            edge = graph[u][k]
+            edge[1] -= 1
+            graph[v][edge[3]][1] += 1
+            v = u
+
+    assigned = [None] * parties
+    for i in range(parties):
+        for v, capacity, _, _ in graph[1 + i]:
+            if v > parties and v != sink and capacity == 0:
+                assigned[i] = sizes[v - 1 - parties]
+    return assigned
+
+class AsyncReservationDesk:
+    # asyncio front end for a host stand. Bookings only hold the manager lock for the commit,
+    # so calls run inline on the event loop instead of in an executor.
+    def __init__(self, manager):
+        self.manager = manager
+
+    async def book_table(self, party_size, date, slot):
+        return self.manager.book_table(party_size, date, slot)
+
+    async def book_interval(self, party_size, date, start, duration_minutes):
+        return self.manager.book_interval(party_size, date, start, duration_minutes)
+
+    async def cancel_reservation(self, reservation_id):
+        return self.manager.cancel_reservation(reservation_id)
+
+    async def modify_reservation(self, reservation_id, **changes):
+        return self.manager.modify_reservation(reservation_id, **changes)
+
+    async def wait_for_table(self, party_size, date, slot):
+        # Books now if possible, otherwise waits on the slot's waitlist until a cancellation promotes it
+        loop = asyncio.get_running_loop()
+        promoted = loop.create_future()
+
+        def resolve(entry):
+            if not promoted.done():  # The waiter may have been cancelled in the meantime
+                promoted.set_result(entry)
+
+        result = self.manager.book_or_waitlist(
+            party_size, date, slot, on_promoted=lambda entry: loop.call_soon_threadsafe(resolve, entry))
+        if result.status is not ReservationStatus.WAITLISTED:
+            return result
+        try:
+            entry = await promoted
+        except asyncio.CancelledError:
+            if not self.manager.leave_waitlist(result.waitlist_entry):
+                # Promoted before the cancellation landed; nobody is left to claim the table
+                self.manager.cancel_reservation(result.waitlist_entry.reservation.reservation_id)
+            raise
+        return ReservationResult(ReservationStatus.BOOKED, entry.reservation)
+
+def check_no_double_booking(manager):
+    # Every table's intervals are disjoint and are exactly the bookings of its reservations
+    expected = defaultdict(list)
+    for reservation in manager.reservations_by_id.values():
+        assert sum(table.size.value for table in reservation.tables) >= reservation.party_size, 'party does not fit'
+        for table in reservation.tables:
+            expected[table.table_id, reservation.date].append((reservation.start, reservation.end))
+    for table in manager.tables_by_id.values():
+        for date, intervals in table.intervals.items():
+            assert all(a[1] <= b[0] for a, b in zip(intervals, intervals[1:])), 'table double-booked'
+            assert sorted(expected.pop((table.table_id, date), [])) == intervals, 'booking without reservation'
+    assert not expected, 'reservation without booking'
+    for (date, slot), bitmaps in manager.free_tables.items():
+        for size, tables in manager.tables.items():
+            assert bitmaps[size] == sum(1 << t.index for t in tables if t.is_available(date, slot)), 'stale bitmap'
+
+def run_booking_stress_test(threads=32, requests_per_thread=300, tables_per_size=6, tasks=2000):
+    """
+    Hammers one ReservationManager with bookings, cancellations, modifications and waitlist
+    joins from many OS threads (with a tiny GIL switch interval to force interleavings) and
+    then from asyncio tasks, and checks afterwards that no table was double-booked. It also
+    races every thread for a single last table and checks exactly one wins.
+    """
+    dates = ['2023-08-01', '2023-08-02']
+    manager = ReservationManager()
+    for size in TableSize:
+        manager.create_table(size, tables_per_size)
+    manager.connect_tables(*sorted(manager.tables_by_id))
+    counts = defaultdict(int)
+    waitlisted = []
+    errors = []
+    count_lock = threading.Lock()
+
+    def requests(rng, mine, entries, local):
+        for _ in range(requests_per_thread):
+            date, slot, action = rng.choice(dates), rng.choice(list(TimeSlot)), rng.random()
+            if action < 0.4:
+                result = manager.book_table(rng.randint(1, 8), date, slot)
+            elif action < 0.55:
+                result = manager.book_interval(rng.randint(1, 6), date, rng.randrange(17 * 60, 22 * 60, 15), 90)
+            elif action < 0.65:
+                result = manager.book_or_waitlist(rng.randint(1, 4), date, slot)
+            elif action < 0.85 and mine:
+                result = manager.cancel_reservation(mine.pop(rng.randrange(len(mine))))
+            elif mine:
+                result = manager.modify_reservation(rng.choice(mine), party_size=rng.randint(1, 8),
+                                                    slot=rng.choice(list(TimeSlot)))
+            else:
+                continue
+            local[result.status] += 1
+            if result.status is ReservationStatus.BOOKED:
+                mine.append(result.reservation.reservation_id)
+            elif result.status is ReservationStatus.WAITLISTED:
+                entries.append(result.waitlist_entry)
+
+    def host(seed):
+        rng = random.Random(seed)
+        mine = []
+        entries = []
+        local = defaultdict(int)
+        try:
+            requests(rng, mine, entries, local)
+        except Exception as e:  # A crashed host must fail the test, not just end its thread
+            errors.append(e)
+            raise
+        with count_lock:
+            waitlisted.extend(entries)
+            for status, count in local.items():
+                counts[status] += count
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        workers = [threading.Thread(target=host, args=(seed,)) for seed in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        # Last-table race: every thread tries to book the only free table at the same moment
+        last = ReservationManager()
+        last.create_table(TableSize.LARGE, 1)
+        barrier = threading.Barrier(threads)
+        wins = []
+
+        def racer():
+            barrier.wait()
+            if last.book_table(4, '2023-08-03', TimeSlot.FIRST):
+                wins.append(1)
+
+        racers = [threading.Thread(target=racer) for _ in range(threads)]
+        for racer_thread in racers:
+            racer_thread.start()
+        for racer_thread in racers:
+            racer_thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    assert not errors, f'{len(errors)} hosts crashed: {errors[0]!r}'
+    check_no_double_booking(manager)
+    check_no_double_booking(last)
+    assert len(wins) == 1, f'{len(wins)} hosts booked the last table'
+    promoted = sum(1 for entry in waitlisted if entry.status == 'promoted')
+    print(f'threads: {threads * requests_per_thread} requests in {elapsed:.2f}s, '
+          f'{counts[ReservationStatus.BOOKED]} booked, {counts[ReservationStatus.CANCELLED]} cancelled, '
+          f'{counts[ReservationStatus.WAITLISTED]} waitlisted ({promoted} promoted); last table won by 1 of {threads}; no double-booking')
+
+    async def run_async():
+        desk = AsyncReservationDesk(manager)
+        rng = random.Random(0)
+
+        async def guest(i):
+            date, slot = rng.choice(dates), rng.choice(list(TimeSlot))
+            result = await desk.book_table(rng.randint(1, 6), date, slot)
+            await asyncio.sleep(0)  # Let other guests interleave while the booking is held
+            if result and i % 2:
+                await desk.cancel_reservation(result.reservation.reservation_id)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(guest(i) for i in range(tasks)))
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(run_async())
+    check_no_double_booking(manager)
+    print(f'asyncio: {tasks} guests in {elapsed:.2f}s; no double-booking')
+    return counts
 
 def main():
     manager = ReservationManager()
@@ -137,9 +776,43 @@ def main():
     print(res1)
     print(res2)  # Should state no available table due to size constraints or slot availability
 
-    print(manager.cancel_reservation(res1.reservation_id))
+    print(manager.cancel_reservation(res1.reservation.reservation_id))
     res3 = manager.book_table(3, '2023-07-22', TimeSlot.FIRST)
     print(res3)  # Should now book successfully
 
+    # Any start time and length; overlaps with fixed slots are detected either way
+    early = manager.book_interval(2, '2023-07-22', '17:00', 120)  # 17:00-19:00 overlaps FIRST
+    print(early)
+    print(manager.book_table(2, '2023-07-22', TimeSlot.FIRST))  # The other small table
+    print(manager.book_table(2, '2023-07-22', TimeSlot.FIRST))  # Both medium tables are taken too
+    print(manager.book_interval(2, '2023-07-22', '18:45', 30))  # Every table is busy at 18:45
+    late = manager.book_interval(2, '2023-07-22', '19:00', 30)  # Table 1 is free again from 19:00
+    print(late)
+
+    # Lookups, modifications and cancellations go through the id, date and table indexes
+    print(manager.modify_reservation(late.reservation.reservation_id, slot=TimeSlot.THIRD))
+    print(manager.modify_reservation(late.reservation.reservation_id, party_size=5))  # Nothing seats 5
+    print([r.reservation_id for r in manager.reservations_for_table(1, '2023-07-22')])
+    print(manager.cancel_reservation(999))
+
+    # Large parties on pushed-together tables, and a whole slot's requests assigned at once
+    dining_room = ReservationManager()
+    dining_room.create_table(TableSize.MEDIUM, 1)
+    dining_room.create_table(TableSize.LARGE, 3)
+    dining_room.connect_tables(3, 4)
+    seven = dining_room.book_table(7, '2023-07-23', TimeSlot.SECOND)
+    print(seven)  # Tables 3+4
+    for result in dining_room.assign_batch([2, 4, 3], '2023-07-23', TimeSlot.SECOND):
+        print(result)  # First-fit would give the 2 the 3-seat table and turn the 3 away
+
+    # Waitlist: a cancellation promotes the first waiting party that now fits
+    waiting = dining_room.book_or_waitlist(4, '2023-07-23', TimeSlot.SECOND)
+    print(waiting)
+    dining_room.cancel_reservation(seven.reservation.reservation_id)
+    print(f"Promoted: {waiting.waitlist_entry.reservation}")
+
+    # Many hosts and guests booking at once
+    run_booking_stress_test(threads=16, requests_per_thread=200, tasks=1000)
+
 if __name__ == "__main__":
     main()